@@ -0,0 +1,139 @@
+# answer_cache.py
+# Semantic answer cache in front of /query.
+# Questions are embedded and compared (cosine) against previously answered ones held in a
+# small in-memory matrix; a close enough match returns the stored answer and sources
+# without retrieval or an LLM call. Entries expire after a TTL, the least recently used
+# entry is evicted when full, and everything is dropped when the vector index changes.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+
+CACHE_ENABLED = os.environ.get("MINGLI_ANSWER_CACHE", "1") != "0"
+SIMILARITY_THRESHOLD = float(os.environ.get("MINGLI_ANSWER_CACHE_THRESHOLD", "0.92"))
+TTL_SECONDS = float(os.environ.get("MINGLI_ANSWER_CACHE_TTL", "3600"))
+MAX_ENTRIES = int(os.environ.get("MINGLI_ANSWER_CACHE_SIZE", "512"))
+
+
+def _normalize(vec):
+    v = np.asarray(vec, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+class SemanticCache:
+    """Thread-safe question → (answer, sources) cache keyed by embedding similarity.
+
+    version_fn is called on every lookup; when its value changes (the index was
+    rebuilt or a document was added/removed) all cached answers are discarded.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, ttl=TTL_SECONDS, max_entries=MAX_ENTRIES, version_fn=None):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_fn = version_fn
+        self._entries = OrderedDict()   # entry id -> entry, oldest use first
+        self._matrix = None             # stacked vectors of _entries, rebuilt lazily
+        self._ids = []
+        self._next_id = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    # --- lookup / store ---
+    def lookup(self, vec, k=None):
+        """Best live entry with similarity >= threshold (and the same k), or None."""
+        q = _normalize(vec)
+        with self._lock:
+            self._check_version()
+            self._expire()
+            entry = None
+            if self._entries:
+                if self._matrix is None:
+                    self._ids = list(self._entries)
+                    self._matrix = np.stack([self._entries[i]["vec"] for i in self._ids])
+                sims = self._matrix @ q
+                for pos in np.argsort(-sims):
+                    if sims[pos] < self.threshold:
+                        break
+                    candidate = self._entries[self._ids[pos]]
+                    if k is None or candidate["k"] == k:
+                        entry = dict(candidate, similarity=float(sims[pos]))
+                        self._entries.move_to_end(self._ids[pos])
+                        candidate["hits"] += 1
+                        break
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.inc("answer_cache_requests", result="hit" if entry else "miss")
+        return entry
+
+    def store(self, vec, question, answer, sources, k=None, version=None):
+        """Cache an answer. version is the index version the answer was computed
+        against; if the index has moved on since, the answer is not cached."""
+        with self._lock:
+            self._check_version()
+            if version is not None and version != self._version:
+                return
+            self._entries[self._next_id] = {
+                "vec": _normalize(vec), "question": question, "answer": answer, "sources": sources,
+                "k": k, "created": time.time(), "hits": 0,
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+                metrics.inc("answer_cache_evictions", reason="lru")
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def version(self):
+        with self._lock:
+            self._check_version()
+            return self._version
+
+    # --- maintenance (caller holds the lock) ---
+    def _check_version(self):
+        if self.version_fn is None:
+            return
+        current = self.version_fn()
+        if current != self._version:
+            if self._entries:
+                self.invalidations += 1
+                metrics.inc("answer_cache_invalidations")
+            self._entries.clear()
+            self._matrix = None
+            self._version = current
+
+    def _expire(self):
+        if not self.ttl:
+            return
+        cutoff = time.time() - self.ttl
+        stale = [i for i, e in self._entries.items() if e["created"] < cutoff]
+        for i in stale:
+            del self._entries[i]
+        if stale:
+            self.evictions += len(stale)
+            metrics.inc("answer_cache_evictions", len(stale), reason="ttl")
+            self._matrix = None
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": CACHE_ENABLED, "entries": len(self._entries), "max_entries": self.max_entries,
+                "threshold": self.threshold, "ttl_seconds": self.ttl,
+                "hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else None,
+                "evictions": self.evictions, "invalidations": self.invalidations, "index_version": self._version,
+            }
@@ -6,6 +6,8 @@ import streamlit as st
 import os
 import time
 
+from indexer import Indexer
+
 # --- 1. Core Logic & Setup (Backend part) ---
 
 # Directory to store uploaded files.
@@ -13,13 +15,19 @@ UPLOAD_DIRECTORY = "./uploaded_documents"
 if not os.path.exists(UPLOAD_DIRECTORY):
     os.makedirs(UPLOAD_DIRECTORY)
 
+@st.cache_resource
+def get_indexer():
+    """One background indexer (worker pool + job table) shared by all reruns and sessions."""
+    return Indexer(upload_dir=UPLOAD_DIRECTORY)
+
 def save_uploaded_file(uploaded_file):
-    """Saves the uploaded file to the server's directory."""
+    """Saves the uploaded file to the server's directory and queues it for indexing."""
     try:
         if uploaded_file is not None:
             file_path = os.path.join(UPLOAD_DIRECTORY, uploaded_file.name)
             with open(file_path, "wb") as f:
                 f.write(uploaded_file.getbuffer())
+            get_indexer().submit(file_path)
             return True
     except Exception as e:
         st.error(f"파일 저장 중 오류 발생: {e}")
@@ -31,11 +39,15 @@ def get_file_list():
     return sorted(os.listdir(UPLOAD_DIRECTORY))
 
 def delete_file(filename):
-    """Deletes the specified file from the directory."""
+    """Deletes the specified file and queues removal of its vectors (runs in the background)."""
     try:
         file_path = os.path.join(UPLOAD_DIRECTORY, filename)
         if os.path.exists(file_path):
             os.remove(file_path)
+            get_indexer().remove(filename)
+            # Forget the upload guard and reset the uploader so the same file can be uploaded again.
+            st.session_state.pop("last_upload", None)
+            st.session_state["uploader_generation"] = st.session_state.get("uploader_generation", 0) + 1
             return True
     except Exception as e:
         st.error(f"파일 삭제 중 오류 발생: {e}")
@@ -89,10 +101,14 @@ with st.container(border=True):
     uploaded_file = st.file_uploader(
         "분석할 문서를 여기에 업로드하세요.",
         type=['pdf', 'txt', 'md', 'docx'],
-        label_visibility="collapsed"
+        label_visibility="collapsed",
+        key=f"uploader_{st.session_state.get('uploader_generation', 0)}"
     )
 
-    if uploaded_file:
+    # The uploader keeps its value across reruns; only save/enqueue each upload once.
+    upload_key = (uploaded_file.name, uploaded_file.size) if uploaded_file else None
+    if uploaded_file and upload_key != st.session_state.get("last_upload"):
+        st.session_state["last_upload"] = upload_key
         if save_uploaded_file(uploaded_file):
             st.success(f"✅ **{uploaded_file.name}** 파일이 성공적으로 업로드되었습니다!")
             # Rerun the script to immediately reflect the change in the file list
@@ -103,20 +119,37 @@ with st.container(border=True):
     st.header("2. 업로드된 문서 관리")
     file_list = get_file_list()
 
+    indexer = get_indexer()
     if not file_list:
         st.info("현재 업로드된 문서가 없습니다. 위에서 문서를 추가해주세요.")
     else:
-        # Display each file with a delete button
+        # Display each file with its indexing status and a delete button
         for filename in file_list:
             col1, col2 = st.columns([0.8, 0.2])
             with col1:
                 st.markdown(f"📄 **{filename}**")
+                job = indexer.status(filename)
+                if job is None or job.action == "delete":
+                    st.caption("색인 정보 없음")
+                elif job.status in ("queued", "running"):
+                    st.progress(job.progress, text=f"색인 중: {job.stage or '대기'} ({job.progress:.0%})")
+                elif job.status == "done":
+                    st.caption(f"✅ 색인 완료 · {job.blocks}개 블록")
+                elif job.status == "failed":
+                    st.caption(f"⚠️ 색인 실패: {job.error}")
             with col2:
                 # Use a unique key for each button to ensure they work independently
                 if st.button("삭제", key=f"delete_{filename}"):
                     if delete_file(filename):
                         st.toast(f"🗑️ '{filename}' 파일이 삭제되었습니다.")
                         st.rerun()
+    # Deletions run in the background too; their files are already gone from the list above.
+    for job in indexer.jobs():
+        if job.action == "delete" and job.status in ("queued", "running") and job.filename not in file_list:
+            st.caption(f"🗑️ {job.filename}: 색인에서 삭제 중")
+    if any(j.status in ("queued", "running") for j in indexer.jobs()):
+        if st.button("색인 상태 새로고침", key="refresh_jobs"):
+            st.rerun()
 
 # --- Section 3: Question & Answer ---
 with st.container(border=True):
@@ -0,0 +1,256 @@
+# indexer.py
+# Background indexing of uploaded documents into the shared vector index.
+# Uploads are queued on a small local thread pool so the Streamlit rerun never blocks.
+
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# The extraction/segmentation code and the shared index live in the repository root.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import metrics  # noqa: E402
+from dedup_index import DEDUP_DB_PATH, DedupIndex  # noqa: E402
+
+INDEX_DIR = os.environ.get("MINGLI_INDEX_DIR", os.path.join(ROOT_DIR, "saju_vector_db"))
+EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_BATCH_SIZE = 64
+MAX_WORKERS = int(os.environ.get("MINGLI_INDEX_WORKERS", "2"))
+CHUNK_CHARS = 1200  # fallback segment size for documents without case markers
+VERSION_FILE = ".version"  # touched after every write so readers can drop stale caches
+
+
+class IndexJob:
+    """Status of one indexing (or delete) job. Read by the UI, written by the worker."""
+
+    def __init__(self, filename, path, action="index"):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.filename = filename
+        self.path = path
+        self.action = action     # index | delete
+        self.status = "queued"   # queued → running → done | failed | cancelled
+        self.stage = ""
+        self.progress = 0.0
+        self.blocks = 0
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.cancelled = False
+
+    def as_dict(self):
+        return {k: v for k, v in vars(self).items() if k != "path"}
+
+
+class Indexer:
+    """Owns the worker pool, the job table and the shared vector store."""
+
+    def __init__(self, index_dir=INDEX_DIR, max_workers=MAX_WORKERS, embeddings=None, dedup_db=DEDUP_DB_PATH,
+                 upload_dir=None):
+        self.index_dir = index_dir
+        self.upload_dir = upload_dir      # where to find other uploads that need re-indexing after a delete
+        self.dedup_db = dedup_db          # None disables near-duplicate filtering
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="indexer")
+        self._jobs = {}                   # filename -> latest IndexJob
+        self._lock = threading.Lock()     # guards _jobs
+        self._db_lock = threading.Lock()  # serialises writes to the vector store and the dedup index
+        self._embeddings = embeddings
+        self._db = None
+
+    # --- job control ---
+    def submit(self, path):
+        """Queue (re)indexing of a saved upload. Returns the new job."""
+        return self._enqueue(IndexJob(os.path.basename(path), path))
+
+    def remove(self, filename):
+        """Queue deletion of the file's vectors and dedup entries; cancels any pending job for it.
+        Runs on the pool like indexing, so the caller (a Streamlit rerun) never waits on the vector store."""
+        return self._enqueue(IndexJob(filename, None, action="delete"))
+
+    def _enqueue(self, job):
+        with self._lock:
+            previous = self._jobs.get(job.filename)
+            if previous is not None and previous.status in ("queued", "running"):
+                previous.cancelled = True
+            self._jobs[job.filename] = job
+        metrics.inc("index_jobs", status="queued")
+        self._pool.submit(self._run, job)
+        return job
+
+    def status(self, filename):
+        with self._lock:
+            return self._jobs.get(filename)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    # --- vector store ---
+    def _get_db(self):
+        if self._db is None:
+            from langchain.vectorstores import Chroma
+            if self._embeddings is None:
+                from langchain.embeddings import HuggingFaceEmbeddings
+                self._embeddings = HuggingFaceEmbeddings(model_name=EMBED_MODEL)
+            self._db = Chroma(persist_directory=self.index_dir,
+                              embedding_function=metrics.timed_embeddings(self._embeddings, embed_type="HF"))
+        return self._db
+
+    def _delete_vectors(self, filename):
+        from saju_embed_and_search_multi import delete_source
+        db = self._get_db()
+        deleted = delete_source(db, filename)
+        if deleted:
+            db.persist()
+            touch_index_version(self.index_dir)
+        return deleted
+
+    # --- dedup index (caller holds _db_lock) ---
+    def _dedup_blocks(self, blocks, filename):
+        if self.dedup_db is None:
+            return blocks
+        index = DedupIndex(self.dedup_db)
+        try:
+            return index.filter_blocks(blocks, filename, replace=True)
+        finally:
+            index.close()
+
+    def _forget_blocks(self, filename):
+        """Drop the file's dedup entries. Returns the other sources whose duplicate blocks may now be canonical."""
+        if self.dedup_db is None:
+            return []
+        index = DedupIndex(self.dedup_db)
+        try:
+            dependents = index.dependents(filename)
+            index.remove(filename)
+            return dependents
+        finally:
+            index.close()
+
+    def _source_path(self, source):
+        with self._lock:
+            job = self._jobs.get(source)
+        if job is not None and job.path and os.path.exists(job.path):
+            return job.path
+        if self.upload_dir and os.path.exists(os.path.join(self.upload_dir, source)):
+            return os.path.join(self.upload_dir, source)
+        return None
+
+    # --- worker ---
+    def _run(self, job):
+        if job.cancelled:
+            job.status = "cancelled"
+            return
+        job.status = "running"
+        try:
+            with metrics.timer("index_job_seconds"):
+                self._delete(job) if job.action == "delete" else self._index(job)
+            job.status = "cancelled" if job.cancelled else "done"
+        except Exception as e:
+            job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            job.finished = time.time()
+            metrics.inc("index_jobs", status=job.status)
+
+    def _delete(self, job):
+        job.stage = "delete"
+        with self._db_lock:
+            if job.cancelled:  # re-uploaded meanwhile; that job replaces the vectors itself
+                return
+            dependents = self._forget_blocks(job.filename)
+            if os.path.isdir(self.index_dir):
+                self._delete_vectors(job.filename)
+        job.progress = 1.0
+        # duplicates of this file's cases recorded under other uploads are canonical now: embed them
+        for source in dependents:
+            path = self._source_path(source)
+            if path is not None:
+                self.submit(path)
+
+    def _index(self, job):
+        job.stage = "extract"
+        text = extract_document_text(job.path)
+        job.progress = 0.1
+        if job.cancelled:
+            return
+
+        job.stage = "segment"
+        blocks = segment_text(text)
+        job.blocks = len(blocks)
+        job.progress = 0.2
+        if job.cancelled or not blocks:
+            job.progress = 1.0
+            return
+
+        from saju_embed_and_search_multi import add_blocks
+        db = self._get_db()
+        with self._db_lock:
+            # near-duplicates of blocks already indexed from other files are only recorded as sources
+            job.stage = "dedup"
+            blocks = self._dedup_blocks(blocks, job.filename)
+            job.blocks = len(blocks)
+            job.stage = "embed"
+            # re-uploading a file replaces its previous vectors
+            self._delete_vectors(job.filename)
+            for start in range(0, len(blocks), EMBED_BATCH_SIZE):
+                if job.cancelled:
+                    # the re-upload or delete job that cancelled this one cleans up the dedup entries
+                    self._delete_vectors(job.filename)
+                    return
+                end = start + EMBED_BATCH_SIZE
+                add_blocks(db, blocks[start:end], job.filename, start)
+                job.progress = 0.2 + 0.8 * min(end, len(blocks)) / len(blocks)
+            db.persist()
+            touch_index_version(self.index_dir)
+        metrics.inc("indexed_blocks", len(blocks), db_type="Chroma")
+        job.progress = 1.0
+
+
+def index_version(index_dir=INDEX_DIR):
+    """Cheap cross-process change token for the vector index: the newest mtime among
+    its top-level entries. Chroma rewrites chroma.sqlite3 on every write, FAISS rewrites
+    index.faiss, and the indexer also touches VERSION_FILE after each write."""
+    try:
+        entries = list(os.scandir(index_dir))
+    except FileNotFoundError:
+        return None
+    return max((e.stat().st_mtime_ns for e in entries), default=0)
+
+
+def touch_index_version(index_dir=INDEX_DIR):
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, VERSION_FILE), "w") as f:
+        f.write(str(time.time_ns()))
+
+
+def extract_document_text(path):
+    """Plain text of an uploaded document (pdf, txt, md, docx)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".docx":
+        from docx import Document
+        return "\n".join(p.text for p in Document(path).paragraphs)
+    from saju_embed_and_search_multi import extract_text
+    return extract_text(path)
+
+
+def segment_text(text):
+    """Split into case/rule blocks; fall back to fixed-size paragraph chunks."""
+    from saju_embed_and_search_multi import parse_cases
+    blocks = parse_cases(text)
+    if blocks:
+        return blocks
+    chunks, current = [], ""
+    for para in (p.strip() for p in text.split("\n\n")):
+        if not para:
+            continue
+        if current and len(current) + len(para) > CHUNK_CHARS:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{para}" if current else para
+    if current:
+        chunks.append(current)
+    return [{"제목": c.splitlines()[0][:50], "내용": c, "요약": c[:200], "구분": "기타"} for c in chunks]
@@ -1,11 +1,22 @@
+import json
+import os
+
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field
 
-app = FastAPI()
+from indexer import INDEX_DIR, EMBED_MODEL, index_version  # 업로드 색인과 같은 벡터 DB 사용 (루트 경로도 여기서 추가됨)
+import metrics
+from answer_cache import CACHE_ENABLED, SemanticCache
+from saju_embed_and_search_multi import build_context, gpt_summary_stream
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
 
-# 정적 파일(HTML, CSS, JS) 서빙
-app.mount("/", StaticFiles(directory="static", html=True), name="static")
+app = FastAPI()
+metrics.instrument_app(app)  # 라우트 지연시간 + GET /metrics (답변 캐시 적중률, LLM 첫 토큰 지연 등)
 
 # CORS 허용
 app.add_middleware(
@@ -15,9 +26,116 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 질문 응답 API
+# 검색용 임베딩/벡터 DB (첫 질문 때 한 번만 로드)
+_embeddings = None
+_store = None
+
+def get_embeddings():
+    global _embeddings
+    if _embeddings is None:
+        from langchain.embeddings import HuggingFaceEmbeddings
+        _embeddings = metrics.timed_embeddings(HuggingFaceEmbeddings(model_name=EMBED_MODEL), embed_type="HF")
+    return _embeddings
+
+def get_store():
+    global _store
+    if _store is None:
+        from langchain.vectorstores import Chroma
+        _store = Chroma(persist_directory=INDEX_DIR, embedding_function=get_embeddings())
+    return _store
+
+def retrieve(question, k=3, vec=None):
+    """vec(질문 임베딩)를 주면 다시 임베딩하지 않고 벡터로 검색."""
+    if not os.path.isdir(INDEX_DIR):
+        return []
+    with metrics.timer("search_seconds", db_type="Chroma"):
+        if vec is not None:
+            return get_store().similarity_search_by_vector(vec, k=k)
+        return get_store().similarity_search(question, k=k)
+
+# 의미 기반 답변 캐시: 표현만 다른 같은 질문은 검색/LLM 없이 저장된 답변을 돌려준다 (색인이 바뀌면 비움)
+answer_cache = SemanticCache(version_fn=lambda: index_version(INDEX_DIR))
+
+def _embed_question(question):
+    # 버전을 임베딩 전에 읽어 둔다 → 답변 생성 중 색인이 바뀌면 그 답변은 캐시하지 않음
+    version = answer_cache.version()
+    return get_embeddings().embed_query(question), version
+
+def _source_list(docs):
+    return [{"title": d.metadata.get("title", ""), "source": d.metadata.get("source", "")} for d in docs]
+
+def _sse(data, event=None):
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _answer_events(question, docs, on_complete=None):
+    """sources → context → token … → done 순서의 SSE 이벤트.
+    오류 없이 끝나면 on_complete(전체 답변) 호출 (답변 캐시 저장용)."""
+    yield _sse(_source_list(docs), "sources")
+    context = build_context(question, docs)
+    yield _sse({k: v for k, v in context.items() if k != "text"}, "context")
+    tokens = []
+    try:
+        for token in gpt_summary_stream(question, docs, context):
+            tokens.append(token)
+            yield _sse({"token": token})
+    except Exception as e:
+        yield _sse({"error": f"{type(e).__name__}: {e}"}, "error")
+    else:
+        if on_complete is not None:
+            on_complete("".join(tokens).strip())
+    yield _sse({}, "done")
+
+def _cached_events(hit):
+    """캐시 적중: sources → cache(원래 질문, 유사도) → token → done."""
+    yield _sse(hit["sources"], "sources")
+    yield _sse({"question": hit["question"], "similarity": round(hit["similarity"], 4)}, "cache")
+    yield _sse({"token": hit["answer"]})
+    yield _sse({}, "done")
+
+class QueryRequest(BaseModel):
+    question: str = ""
+    k: int = Field(3, ge=1, le=20)  # 검색할 사례 수 (범위 밖/숫자 아님 → 422)
+    no_cache: bool = False
+
+# 질문 응답 API: 검색 후 LLM 토큰을 SSE 로 스트리밍 (Accept: text/event-stream 가 아니면 JSON 한 번에)
 @app.post("/query")
-async def query(req: Request):
-    data = await req.json()
-    question = data.get("question", "")
-    return {"answer": f"💬 질문 받음: {question}"}
+async def query(body: QueryRequest, req: Request):
+    question = body.question.strip()
+    k = body.k
+    if not question:
+        return {"answer": "질문을 입력해주세요.", "sources": []}
+    stream = "text/event-stream" in req.headers.get("accept", "")
+    sse_headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    vec = version = None
+    if CACHE_ENABLED and not body.no_cache:
+        vec, version = await run_in_threadpool(_embed_question, question)
+        hit = await run_in_threadpool(answer_cache.lookup, vec, k)  # 만료 정리 + 행렬 곱 → 이벤트 루프 밖에서
+        if hit:
+            if stream:
+                return StreamingResponse(_cached_events(hit), media_type="text/event-stream", headers=sse_headers)
+            return {"answer": hit["answer"], "sources": [s["title"] for s in hit["sources"]],
+                    "cached": True, "similarity": hit["similarity"]}
+
+    docs = await run_in_threadpool(retrieve, question, k, vec)
+    sources = _source_list(docs)
+
+    def remember(answer):
+        if vec is not None and answer:
+            answer_cache.store(vec, question, answer, sources, k=k, version=version)
+
+    if stream:
+        return StreamingResponse(_answer_events(question, docs, remember), media_type="text/event-stream",
+                                 headers=sse_headers)
+    answer = await run_in_threadpool(lambda: "".join(gpt_summary_stream(question, docs)).strip())
+    remember(answer)
+    return {"answer": answer, "sources": [s["title"] for s in sources]}
+
+# 답변 캐시 적중률/크기
+@app.get("/cache/stats")
+def cache_stats():
+    return answer_cache.stats()
+
+# 정적 파일(HTML, CSS, JS) 서빙 — "/" 마운트는 모든 경로를 잡으므로 API 라우트 뒤에 둔다
+app.mount("/", StaticFiles(directory=STATIC_DIR, html=True), name="static")
@@ -1,10 +1,57 @@
 async function askQuestion() {
   const q = document.getElementById("questionInput").value;
+  const box = document.getElementById("answerBox");
+  const sourcesBox = document.getElementById("sourcesBox");
+  box.textContent = "";
+  sourcesBox.textContent = "";
   const res = await fetch("/query", {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
     body: JSON.stringify({ question: q }),
   });
-  const data = await res.json();
-  document.getElementById("answerBox").textContent = data.answer;
-}
\ No newline at end of file
+  const ctype = res.headers.get("Content-Type") || "";
+  if (!res.body || !ctype.startsWith("text/event-stream")) {
+    const data = await res.json();
+    box.textContent = data.answer;
+    return;
+  }
+
+  // SSE: 빈 줄로 구분된 이벤트를 받는 대로 토큰을 화면에 이어 붙인다
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) >= 0) {
+      const raw = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      handleEvent(raw, box, sourcesBox);
+    }
+  }
+}
+
+function handleEvent(raw, box, sourcesBox) {
+  let event = "message";
+  let data = "";
+  for (const line of raw.split("\n")) {
+    if (line.startsWith("event:")) event = line.slice(6).trim();
+    else if (line.startsWith("data:")) data += line.slice(5).trim();
+  }
+  const payload = data ? JSON.parse(data) : {};
+  if (event === "sources") {
+    sourcesBox.textContent = payload.length
+      ? "참고: " + payload.map((s) => s.title).join(", ")
+      : "";
+  } else if (event === "context") {
+    sourcesBox.textContent += ` (문맥 ${payload.tokens}토큰, ${payload.saved_tokens}토큰 절약)`;
+  } else if (event === "cache") {
+    sourcesBox.textContent += ` (저장된 답변: "${payload.question}", 유사도 ${payload.similarity})`;
+  } else if (event === "error") {
+    box.textContent += "\n[오류] " + payload.error;
+  } else if (payload.token) {
+    box.textContent += payload.token;
+  }
+}
@@ -1,17 +1,11 @@
 import os, sqlite3, re, json
-from tkinter import Tk, filedialog, messagebox
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.llms import OpenAI
-import pandas as pd
-from tqdm import tqdm
+import metrics
 
-try:
-    from docx import Document
-except ImportError:
-    Document = None
+# 무거운 모듈(tkinter, langchain, pandas, tqdm, docx)은 실제로 쓰는 함수 안에서 import
+# → CLI/작업 큐에서 가져다 쓸 때 시작이 빠르다
 
-# OpenAI API키 입력
-os.environ["OPENAI_API_KEY"] = "sk-"
+# OpenAI API키 입력 (환경변수에 이미 있으면 그대로 사용)
+os.environ.setdefault("OPENAI_API_KEY", "sk-")
 
 # DB 초기화/생성
 def init_db(db_path="mng_db.sqlite3"):
@@ -36,6 +30,7 @@ def add_case(text, gekuk, explain, ai_text, db_path="mng_db.sqlite3"):
     conn.commit()
     conn.close()
 
+@metrics.timed("pattern_match_seconds")
 def db_gekuk_analyze(text, db_path="mng_db.sqlite3"):
     conn = sqlite3.connect(db_path)
     c = conn.cursor()
@@ -52,15 +47,22 @@ def db_gekuk_analyze(text, db_path="mng_db.sqlite3"):
 
 def extract_texts_from_file(path):
     ext = os.path.splitext(path)[1].lower()
+    with metrics.timer("extract_seconds", ext=ext):
+        texts = _extract_texts(path, ext)
+    metrics.inc("extracted_texts", len(texts), ext=ext)
+    return texts
+
+def _extract_texts(path, ext):
     texts = []
     if ext == ".pdf":
-        loader = PyPDFLoader(path)
-        docs = loader.load_and_split()
+        import pdf_cache  # 페이지 텍스트는 공유 캐시에서 (바뀐 파일만 PyPDFLoader 로 다시 추출)
+        docs = pdf_cache.load_and_split(path)
         texts = [doc.page_content.strip() for doc in docs if doc.page_content.strip()]
     elif ext in [".txt", ".md"]:
         with open(path, encoding="utf-8") as f:
             texts = [line.strip() for line in f if line.strip()]
     elif ext == ".csv":
+        import pandas as pd
         df = pd.read_csv(path, encoding="utf-8")
         # 모든 문자열 컬럼 합치거나 특정 컬럼 지정
         for idx, row in df.iterrows():
@@ -82,7 +84,9 @@ def extract_texts_from_file(path):
                     if isinstance(v, str) and v.strip():
                         texts.append(v.strip())
     elif ext == ".docx":
-        if Document is None:
+        try:
+            from docx import Document
+        except ImportError:
             raise RuntimeError("python-docx 모듈 설치 필요: pip install python-docx")
         doc = Document(path)
         texts = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
@@ -90,27 +94,47 @@ def extract_texts_from_file(path):
         raise ValueError("지원하지 않는 파일 형식: " + ext)
     return texts
 
-def analyze_and_save(file_path, db_path="mng_db.sqlite3"):
-    texts = extract_texts_from_file(file_path)
-    llm = OpenAI(temperature=0.1)
-    cnt = 0
-    for text in tqdm(texts, desc="분석중"):
-        gekuk, explain, patt = db_gekuk_analyze(text, db_path)
-        if gekuk:
-            ai_text = f"[패턴DB] {gekuk} | {explain}"
-        else:
-            prompt = f"""아래 명리 사례(또는 문장)의 격국 및 규칙, 간단한 해설을 생성해줘.
+# 사례 1건 분석(패턴DB → 없으면 LLM) 후 cases 테이블에 저장
+def analyze_text(text, llm, db_path="mng_db.sqlite3"):
+    gekuk, explain, patt = db_gekuk_analyze(text, db_path)
+    if gekuk:
+        # 패턴DB 적중 → LLM 호출 생략
+        metrics.inc("llm_cache_hits", source="pattern_db")
+        ai_text = f"[패턴DB] {gekuk} | {explain}"
+    else:
+        prompt = f"""아래 명리 사례(또는 문장)의 격국 및 규칙, 간단한 해설을 생성해줘.
 가능하다면 격국명, 핵심 규칙/패턴, 간단한 해설을 각각 1줄씩 출력:
 사례: {text}
 """
+        metrics.inc("llm_calls", model="openai")
+        with metrics.timer("llm_seconds", model="openai"):
             ai_text = llm(prompt)
-            if isinstance(ai_text, list): ai_text = ai_text[0]
-            gekuk, explain = "", ""
+        if isinstance(ai_text, list): ai_text = ai_text[0]
+        gekuk, explain = "", ""
+    with metrics.timer("db_write_seconds", table="cases"):
         add_case(text, gekuk or "", explain or "", ai_text.strip(), db_path)
+    return gekuk or "", ai_text.strip()
+
+# 파일 전체 분석 (GUI 없이). 저장 건수 반환
+def analyze_file(file_path, db_path="mng_db.sqlite3"):
+    from langchain_community.llms import OpenAI
+    from tqdm import tqdm
+    texts = extract_texts_from_file(file_path)
+    llm = OpenAI(temperature=0.1)
+    cnt = 0
+    for text in tqdm(texts, desc="분석중"):
+        analyze_text(text, llm, db_path)
         cnt += 1
+    metrics.dump_summary("analyze_and_save")
+    return cnt
+
+def analyze_and_save(file_path, db_path="mng_db.sqlite3"):
+    from tkinter import messagebox
+    cnt = analyze_file(file_path, db_path)
     messagebox.showinfo("분석 완료", f"{cnt}건 DB에 저장!")
 
 def open_and_run():
+    from tkinter import filedialog, messagebox
     path = filedialog.askopenfilename(title="문서 파일 선택", filetypes=[
         ("모든 지원 파일", "*.pdf;*.txt;*.csv;*.json;*.md;*.docx"),
         ("PDF", "*.pdf"), ("TXT", "*.txt"), ("CSV", "*.csv"), ("JSON", "*.json"),
@@ -123,10 +147,10 @@ def open_and_run():
         messagebox.showerror("오류", str(e))
 
 if __name__ == "__main__":
+    from tkinter import Tk, Button, Label
     init_db()
     root = Tk()
     root.title("문서 분석 및 DB 축적기")
-    from tkinter import Button, Label
     Label(root, text="PDF, Word, CSV, TXT, MD, JSON 자동 분석/DB저장", font=("맑은고딕", 14)).pack(pady=16)
     Button(root, text="문서 불러오기/분석", width=28, height=2, command=open_and_run).pack(pady=12)
     Label(root, text="(분석 후 SQLite DB: mng_db.sqlite3/cases에 자동 저장)", font=("맑은고딕", 11)).pack(pady=10)
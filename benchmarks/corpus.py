@@ -0,0 +1,137 @@
+# benchmarks/corpus.py
+# 재현 가능한 합성 사주 말뭉치 생성기 (seed 가 같으면 항상 같은 결과)
+
+import json
+import random
+
+STEMS = "甲乙丙丁戊己庚辛壬癸"
+BRANCHES = "子丑寅卯辰巳午未申酉戌亥"
+ELEMENTS = ["목", "화", "토", "금", "수"]
+STRUCTURES = ["관인상생", "식신생재", "상관견관", "재다신약", "살인상생", "종재격", "건록격", "양인격", "편인도식", "군겁쟁재"]
+TEN_GODS = ["비견", "겁재", "식신", "상관", "편재", "정재", "편관", "정관", "편인", "정인"]
+OUTCOMES = ["재물운 상승", "혼인 성사", "관직 승진", "건강 악화", "사업 실패", "학업 성취", "이동수 발생", "소송 발생"]
+
+# 규모별 크기: 사례 블록 수 / 패턴 수 / 용어 수 / DB 행 수
+SCALES = {
+    "tiny": {"cases": 50, "patterns": 20, "terms": 50, "rows": 100},
+    "small": {"cases": 500, "patterns": 100, "terms": 200, "rows": 1000},
+    "medium": {"cases": 5000, "patterns": 300, "terms": 800, "rows": 10000},
+    "large": {"cases": 50000, "patterns": 1000, "terms": 2000, "rows": 100000},
+}
+
+
+def make_chart(rng):
+    """연/월/일/시 4기둥의 (천간 4글자, 지지 4글자)."""
+    return "".join(rng.choice(STEMS) for _ in range(4)), "".join(rng.choice(BRANCHES) for _ in range(4))
+
+
+def make_sentence(rng, stems, branches):
+    day = stems[2]
+    return rng.choice([
+        f"{day}일주가 {rng.choice(BRANCHES)}월에 태어나 {rng.choice(TEN_GODS)}이(가) 투출하였다.",
+        f"{rng.choice(STEMS)}{rng.choice(BRANCHES)} 대운에 {rng.choice(OUTCOMES)}.",
+        f"{rng.choice(STRUCTURES)} 구조로 {rng.choice(TEN_GODS)}이 {rng.choice(TEN_GODS)}을 제압한다.",
+        f"{branches[rng.randrange(4)]}{branches[rng.randrange(4)]} 충으로 {rng.choice(ELEMENTS)}의 기운이 손상된다.",
+        f"{rng.choice(ELEMENTS)}이 왕하여 {rng.choice(TEN_GODS)}을 용신으로 삼는다.",
+    ])
+
+
+def make_case_block(rng, n):
+    """parse_cases 가 인식하는 표지(◉, <사례 N>, ■, 사례 N, 예시 N) 중 하나로 시작하는 블록."""
+    stems, branches = make_chart(rng)
+    marker = rng.choice(["◉", f"<사례 {n}>", "■", f"사례 {n}", f"예시 {n}"])
+    title = rng.choice([f"사례 {n} {rng.choice(STRUCTURES)}", f"{rng.choice(STRUCTURES)}의 법칙", f"{stems[2]}일간 분석"])
+    lines = [
+        f"{marker} {title}",
+        f"천간: {' '.join(stems)}",
+        f"지지: {' '.join(branches)}",
+        f"격국: {rng.choice(STRUCTURES)} / 공망: {rng.choice(BRANCHES)}{rng.choice(BRANCHES)}",
+    ]
+    lines += [make_sentence(rng, stems, branches) for _ in range(rng.randint(3, 12))]
+    return "\n".join(lines)
+
+
+def make_corpus(n_cases, seed=0):
+    rng = random.Random(seed)
+    return "\n\n".join(make_case_block(rng, i + 1) for i in range(n_cases))
+
+
+def make_texts(n, seed=0):
+    """한 줄짜리 사례 문장 목록 (패턴 매칭용)."""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        stems, branches = make_chart(rng)
+        out.append(f"{stems}/{branches} " + make_sentence(rng, stems, branches))
+    return out
+
+
+def make_patterns(n, seed=0):
+    """patterns 테이블 행 (pattern, gekuk, explain). 대부분 불일치하도록 희소하게 구성."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        kind = i % 3
+        if kind == 0:
+            patt = f"{rng.choice(STEMS)}{rng.choice(BRANCHES)}{rng.choice(STEMS)}일주"
+        elif kind == 1:
+            patt = f"{rng.choice(STRUCTURES)}.*{rng.choice(OUTCOMES)}"
+        else:
+            patt = f"{rng.choice(TEN_GODS)}이 {rng.choice(TEN_GODS)}을 (생|제압)한다"
+        rows.append((patt, rng.choice(STRUCTURES), f"합성 패턴 {i}"))
+    return rows
+
+
+def make_terms(n, seed=0):
+    """용어 사전 행: term_id, term, category_id, description."""
+    rng = random.Random(seed)
+    terms = []
+    for i in range(n):
+        words = [rng.choice(TEN_GODS + STRUCTURES + ELEMENTS + OUTCOMES) for _ in range(rng.randint(4, 10))]
+        terms.append({
+            "term_id": i + 1,
+            "term": f"{rng.choice(TEN_GODS)}{i}",
+            "category_id": rng.randint(1, 10),
+            "description": " ".join(words),
+        })
+    return terms
+
+
+def make_case_rows(n, seed=0):
+    """main.py CaseCreate 형식의 행."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        stems, branches = make_chart(rng)
+        rows.append({
+            "case_title": f"합성 사례 {i}",
+            "birth_info": f"{rng.randint(1940, 2010)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "celestial_stems": stems,
+            "terrestrial_branches": branches,
+            "structure_type": rng.choice(STRUCTURES),
+            "empty_absence": rng.choice(BRANCHES) + rng.choice(BRANCHES),
+            "major_fortune": f"{rng.randint(1, 9) * 10}세 {rng.choice(STEMS)}{rng.choice(BRANCHES)}대운",
+            "suppression_method": rng.choice(TEN_GODS),
+        })
+    return rows
+
+
+def write_files(tmpdir, n_cases, seed=0):
+    """extract_texts_from_file 용 .txt/.md/.csv/.json 파일 생성. {확장자: 경로} 반환."""
+    import csv, os
+    text = make_corpus(n_cases, seed)
+    rows = make_case_rows(n_cases, seed)
+    paths = {}
+    for ext in (".txt", ".md"):
+        paths[ext] = os.path.join(tmpdir, "corpus" + ext)
+        with open(paths[ext], "w", encoding="utf-8") as f:
+            f.write(text)
+    paths[".csv"] = os.path.join(tmpdir, "corpus.csv")
+    with open(paths[".csv"], "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0]))
+        w.writeheader()
+        w.writerows(rows)
+    paths[".json"] = os.path.join(tmpdir, "corpus.json")
+    with open(paths[".json"], "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False)
+    return paths
@@ -0,0 +1,80 @@
+# benchmarks/fakes.py
+# 네트워크/모델 없이 돌릴 수 있는 결정적(deterministic) 가짜 임베더·LLM·DB 커서
+
+import hashlib
+import math
+
+
+class FakeEmbeddings:
+    """문자 2-gram 해싱 임베딩. langchain Embeddings 인터페이스(embed_documents/embed_query)."""
+
+    def __init__(self, dim=64):
+        self.dim = dim
+
+    def _embed(self, text):
+        vec = [0.0] * self.dim
+        for i in range(len(text) - 1):
+            h = int.from_bytes(hashlib.blake2b(text[i:i + 2].encode("utf-8"), digest_size=4).digest(), "little")
+            vec[h % self.dim] += 1.0 if h & 1 << 31 else -1.0
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+    def __call__(self, text):
+        return self._embed(text)
+
+
+class FakeLLM:
+    """프롬프트 해시로 고정 응답을 만드는 LLM. llm(prompt) 와 stream(prompt) 지원."""
+
+    def __init__(self, n_tokens=40):
+        self.n_tokens = n_tokens
+
+    def _tokens(self, prompt):
+        seed = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+        words = ["격국은", "관인상생", "이며", "재성이", "대운에서", "작용한다.", "식신이", "살을", "제압하여", "현실적으로", "길하다."]
+        return [words[int(seed[i % 40], 16) % len(words)] + " " for i in range(self.n_tokens)]
+
+    def __call__(self, prompt):
+        return "".join(self._tokens(prompt)).strip()
+
+    def stream(self, prompt):
+        yield from self._tokens(prompt)
+
+
+class FakeNounTokenizer:
+    """konlpy Okt 대용: 공백 단위 토큰을 명사로 간주."""
+
+    def nouns(self, text):
+        return text.split()
+
+
+class FakeCursor:
+    """pymysql 커서 대용: 실행된 쿼리 수만 센다."""
+
+    def __init__(self):
+        self.executed = 0
+
+    def execute(self, query, params=None):
+        self.executed += 1
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cursors = []
+
+    def cursor(self):
+        cur = FakeCursor()
+        self.cursors.append(cur)
+        return cur
+
+    def commit(self):
+        pass
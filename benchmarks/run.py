@@ -0,0 +1,290 @@
+# benchmarks/run.py
+# 핫패스 벤치마크 실행기. 결과는 JSON 으로 저장하고 커밋 간 비교할 수 있다.
+#
+#   python -m benchmarks.run --scale small --out bench_base.json
+#   python -m benchmarks.run --scale small --out bench_new.json --compare bench_base.json
+#
+# 설치되지 않은 의존성(langchain, pandas, konlpy 등)이 필요한 항목은 "skipped" 로 기록된다.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import corpus, fakes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCHES = {}
+
+
+def bench(name):
+    """setup(ctx) -> (fn, ops) 를 등록. fn() 한 번 실행 시간을 repeat 회 측정."""
+    def deco(setup):
+        BENCHES[name] = setup
+        return setup
+    return deco
+
+
+# --- 1. 벤치마크 항목 ---
+@bench("parse_cases")
+def _parse_cases(ctx):
+    from embed_and_search_fixed import parse_cases
+    text = corpus.make_corpus(ctx["scale"]["cases"], ctx["seed"])
+    return (lambda: parse_cases(text)), ctx["scale"]["cases"]
+
+
+@bench("db_gekuk_analyze")
+def _db_gekuk_analyze(ctx):
+    from ai_manager import db_gekuk_analyze
+    db_path = os.path.join(ctx["tmp"], "patterns.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS patterns (id INTEGER PRIMARY KEY AUTOINCREMENT, pattern TEXT, gekuk TEXT, explain TEXT)")
+    conn.executemany("INSERT INTO patterns (pattern, gekuk, explain) VALUES (?, ?, ?)",
+                     corpus.make_patterns(ctx["scale"]["patterns"], ctx["seed"]))
+    conn.commit()
+    conn.close()
+    texts = corpus.make_texts(min(ctx["scale"]["cases"], 2000), ctx["seed"])
+
+    def run():
+        for t in texts:
+            db_gekuk_analyze(t, db_path)
+    return run, len(texts)
+
+
+@bench("analyze_text")
+def _analyze_text(ctx):
+    """패턴DB 적중/미적중(가짜 LLM 호출) + 사례 저장까지 문장 하나의 분석 경로 전체."""
+    from ai_manager import analyze_text, init_db
+    db_path = os.path.join(ctx["tmp"], "analyze.sqlite3")
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO patterns (pattern, gekuk, explain) VALUES (?, ?, ?)",
+                     corpus.make_patterns(ctx["scale"]["patterns"], ctx["seed"]))
+    conn.commit()
+    conn.close()
+    texts = corpus.make_texts(min(ctx["scale"]["cases"], 500), ctx["seed"])
+    llm = fakes.FakeLLM()
+
+    def run():
+        for t in texts:
+            analyze_text(t, llm, db_path)
+    return run, len(texts)
+
+
+@bench("extract_texts_from_file")
+def _extract_texts(ctx):
+    from ai_manager import extract_texts_from_file
+    paths = corpus.write_files(ctx["tmp"], ctx["scale"]["cases"], ctx["seed"])
+
+    def run():
+        for p in paths.values():
+            extract_texts_from_file(p)
+    return run, len(paths)
+
+
+@bench("embed_and_save")
+def _embed_and_save(ctx):
+    from embed_and_search_fixed import parse_cases
+    from saju_embed_and_search_multi import embed_and_save
+    blocks = parse_cases(corpus.make_corpus(min(ctx["scale"]["cases"], 5000), ctx["seed"]))
+    db_dir = os.path.join(ctx["tmp"], "faiss_embed")
+    emb = fakes.FakeEmbeddings()
+    return (lambda: embed_and_save(blocks, db_dir, "FAISS", "HF", emb=emb)), len(blocks)
+
+
+@bench("search_vector")
+def _search_vector(ctx):
+    from embed_and_search_fixed import parse_cases
+    from saju_embed_and_search_multi import embed_and_save, search_vector
+    blocks = parse_cases(corpus.make_corpus(min(ctx["scale"]["cases"], 5000), ctx["seed"]))
+    db_dir = os.path.join(ctx["tmp"], "faiss_search")
+    emb = fakes.FakeEmbeddings()
+    embed_and_save(blocks, db_dir, "FAISS", "HF", emb=emb)
+    queries = [t.split(" ", 1)[1] for t in corpus.make_texts(50, ctx["seed"] + 1)]
+
+    def run():
+        for q in queries:
+            search_vector(db_dir, q, "FAISS", "HF", k=3, emb=emb)
+    return run, len(queries)
+
+
+@bench("extract_and_store_similar_terms")
+def _similar_terms(ctx):
+    import pandas as pd
+    from term_management_module import extract_and_store_similar_terms
+    terms = corpus.make_terms(ctx["scale"]["terms"], ctx["seed"])
+    okt = fakes.FakeNounTokenizer()
+
+    def run():
+        extract_and_store_similar_terms(fakes.FakeConnection(), pd.DataFrame(terms), threshold=0.5, okt=okt)
+    return run, len(terms)
+
+
+@bench("saju_calc_charts")
+def _saju_calc(ctx):
+    from saju_calc import compute_charts, random_births
+    n = ctx["scale"]["rows"] * 10
+    births, male = random_births(n, ctx["seed"])
+    return (lambda: compute_charts(births, male)), n
+
+
+@bench("chart_similar")
+def _chart_similar(ctx):
+    from chart_index import ChartIndex
+    rows = corpus.make_case_rows(ctx["scale"]["rows"] * 10, ctx["seed"])
+    index = ChartIndex()
+    index.load((i, r["celestial_stems"], r["terrestrial_branches"], r["structure_type"], r["empty_absence"])
+               for i, r in enumerate(rows))
+    queries = rows[:100]
+
+    def run():
+        for r in queries:
+            index.search(r["celestial_stems"], r["terrestrial_branches"], r["structure_type"], r["empty_absence"], k=10)
+    return run, len(queries)
+
+
+def _crud_client(ctx):
+    """main.py 를 임시 디렉터리의 빈 DB 로 띄운 TestClient."""
+    if "client" not in ctx:
+        # main 은 import 시점에 DB/작업 큐를 연다 → 먼저 환경 변수로 임시 경로 지정
+        os.environ["MINGLI_DB_PATH"] = os.path.join(ctx["tmp"], "mingli_analysis.db")
+        os.environ["MINGLI_JOBS_DB"] = os.path.join(ctx["tmp"], "mingli_jobs.sqlite3")
+        os.environ["MINGLI_JOB_WORKERS"] = "0"
+        import main
+        from fastapi.testclient import TestClient
+        ctx["client"] = TestClient(main.app)
+    return ctx["client"]
+
+
+@bench("crud_create_case")
+def _crud_create(ctx):
+    client = _crud_client(ctx)
+    rows = corpus.make_case_rows(min(ctx["scale"]["rows"], 500), ctx["seed"])
+
+    def run():
+        for r in rows:
+            client.post("/cases/", json=r)
+    return run, len(rows)
+
+
+@bench("crud_bulk_cases")
+def _crud_bulk(ctx):
+    client = _crud_client(ctx)
+    rows = corpus.make_case_rows(ctx["scale"]["rows"], ctx["seed"])
+    return (lambda: client.post("/cases/bulk?upsert=true", json=rows)), len(rows)
+
+
+@bench("crud_list_cases")
+def _crud_list(ctx):
+    client = _crud_client(ctx)
+    client.post("/cases/bulk", json=corpus.make_case_rows(ctx["scale"]["rows"], ctx["seed"] + 7))
+    return (lambda: client.get("/cases/", params={"q": "관인"})), 1
+
+
+# --- 2. 실행/측정 ---
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def run_benches(scale="small", seed=0, repeat=5, only=None):
+    os.environ.setdefault("MINGLI_METRICS", "0")  # 계측 오버헤드 배제
+    tmp = tempfile.mkdtemp(prefix="mingli_bench_")
+    ctx = {"scale": corpus.SCALES[scale], "seed": seed, "tmp": tmp}
+    results = {}
+    try:
+        for name, setup in BENCHES.items():
+            if only and name not in only:
+                continue
+            try:
+                fn, ops = setup(ctx)
+            except ImportError as e:
+                results[name] = {"skipped": f"missing dependency: {e.name or e}"}
+                print(f"{name:34s} skipped ({e})")
+                continue
+            times = []
+            try:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    fn()
+                    times.append(time.perf_counter() - start)
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"{name:34s} error ({type(e).__name__}: {e})")
+                continue
+            median = statistics.median(times)
+            results[name] = {
+                "ops": ops, "repeat": repeat,
+                "min_s": min(times), "median_s": median, "mean_s": statistics.mean(times),
+                "ops_per_s": ops / median if median else None,
+            }
+            print(f"{name:34s} median {median * 1000:10.2f} ms  ({results[name]['ops_per_s'] or 0:,.0f} ops/s)")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        "meta": {
+            "commit": _git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+            "scale": scale, "seed": seed, "repeat": repeat, "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.10):
+    """median 기준 비교. threshold 이상 느려진 항목 이름 목록 반환."""
+    regressions = []
+    print(f"\n{'bench':34s} {'base ms':>10s} {'new ms':>10s} {'ratio':>7s}")
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base or "median_s" not in base or "median_s" not in cur:
+            continue
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- regression"
+            regressions.append(name)
+        print(f"{name:34s} {base['median_s'] * 1000:10.2f} {cur['median_s'] * 1000:10.2f} {ratio:7.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="mingli 핫패스 벤치마크")
+    p.add_argument("--scale", choices=list(corpus.SCALES), default="small")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--only", nargs="*", choices=list(BENCHES), help="지정한 항목만 실행")
+    p.add_argument("--out", help="결과 JSON 저장 경로")
+    p.add_argument("--compare", help="비교할 기준 결과 JSON")
+    p.add_argument("--threshold", type=float, default=0.10, help="회귀 판정 비율 (0.10 = 10%% 느려짐)")
+    args = p.parse_args(argv)
+
+    result = run_benches(args.scale, args.seed, args.repeat, args.only)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.out}")
+    status = 0
+    errors = [name for name, r in result["results"].items() if "error" in r]
+    if errors:
+        print(f"\n오류로 측정하지 못한 항목: {', '.join(errors)}")
+        status = 1
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.threshold):
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# benchmarks/startup.py
+# CLI 시작 시간(import 비용) 점검. 새 프로세스로 명령을 여러 번 실행해 중앙값을 재고,
+# `-X importtime` 으로 누적 import 시간이 큰 모듈을 보여준다. 목표를 넘으면 종료 코드 1.
+#
+#   python -m benchmarks.startup                       # cli.py --help, 목표 300ms
+#   python -m benchmarks.startup --target-ms 200 --cmd patterns --help
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, "cli.py")
+# 하위 명령 없이 불러오기만 해도 import 되면 안 되는 모듈
+HEAVY_MODULES = ("langchain", "langchain_community", "pandas", "pdfplumber", "tkinter", "konlpy", "sklearn",
+                 "sentence_transformers", "torch", "docx", "tqdm")
+
+
+def time_command(args, repeat=5):
+    """args 를 새 파이썬 프로세스로 repeat 회 실행한 wall-clock 초 목록."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, CLI, *args], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def import_profile(args, top=10):
+    """`-X importtime` 출력 → 누적 시간(µs) 상위 (모듈, µs) 목록과 import 된 최상위 패키지 집합."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", CLI, *args], cwd=ROOT,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        try:
+            rows.append((name.strip(), int(cumulative)))
+        except ValueError:  # 헤더 줄
+            continue
+    packages = {name.split(".")[0] for name, _ in rows}
+    rows.sort(key=lambda r: r[1], reverse=True)
+    return rows[:top], packages
+
+
+def _python_only():
+    """빈 인터프리터 기동 시간 (비교 기준)."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="cli.py 시작 시간 점검")
+    p.add_argument("--target-ms", type=float, default=300.0, help="중앙값 허용 상한 (ms)")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--top", type=int, default=10, help="import 시간 상위 모듈 수")
+    p.add_argument("--cmd", nargs=argparse.REMAINDER, default=["--help"], help="cli.py 에 넘길 인자 (기본: --help)")
+    args = p.parse_args(argv)
+
+    times = time_command(args.cmd, args.repeat)
+    median_ms = statistics.median(times) * 1000
+    baseline_ms = statistics.median(_python_only() for _ in range(args.repeat)) * 1000
+    print(f"cli.py {' '.join(args.cmd)}: median {median_ms:.1f} ms (min {min(times) * 1000:.1f} ms, "
+          f"빈 인터프리터 {baseline_ms:.1f} ms)")
+
+    top, packages = import_profile(args.cmd, args.top)
+    print(f"\n{'module':40s} {'cumulative ms':>14s}")
+    for name, us in top:
+        print(f"{name:40s} {us / 1000:14.1f}")
+
+    failed = False
+    heavy = sorted(packages.intersection(HEAVY_MODULES))
+    if heavy and args.cmd == ["--help"]:
+        print(f"\n❌ --help 에서 무거운 모듈이 import 됨: {', '.join(heavy)}")
+        failed = True
+    if median_ms > args.target_ms:
+        print(f"\n❌ 목표 {args.target_ms:.0f} ms 초과")
+        failed = True
+    if not failed:
+        print(f"\n✅ 목표 {args.target_ms:.0f} ms 이내")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
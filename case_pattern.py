@@ -1,11 +1,12 @@
 # pdf_case_pattern_ai_init.py
 
-import os, sqlite3, re, pandas as pd
-from tqdm import tqdm
-from langchain.document_loaders import PyPDFLoader
-from langchain.llms import OpenAI
+import os, sqlite3, re
+import metrics
+import pdf_cache
 
-PDF_PATH = "Part_18._교육자.pdf"
+# pandas/tqdm/langchain 은 run() 안에서 import — 모듈을 가져오기만 해서는 아무 작업도 하지 않는다
+
+PDF_PATH = "Part_18._교육자.pdf"   # 분석할 PDF 파일명/경로 입력
 
 # [1] DB 초기화/예시 패턴 자동 추가
 def init_db(db_path="mng_db.sqlite3"):
@@ -42,44 +43,56 @@ def db_gekuk_analyze(text, db_path="mng_db.sqlite3"):
     conn.close()
     return None, None, None
 
-# [3] PDF에서 사례 불러오기
-PDF_PATH = "Part_18._교육자.pdf"   # 분석할 PDF 파일명/경로 입력
-loader = PyPDFLoader(PDF_PATH)
-docs = loader.load_and_split()
-print(f"PDF에서 {len(docs)}건 사례 추출")
+def run(pdf_path=PDF_PATH, db_path="mng_db.sqlite3", out_csv="분석결과.csv"):
+    import pandas as pd
+    from tqdm import tqdm
+    from langchain.llms import OpenAI
 
-# [4] OpenAI LLM
-os.environ["OPENAI_API_KEY"] = "sk-"  # 본인키 입력!
-llm = OpenAI(temperature=0.1)
+    # [3] PDF에서 사례 불러오기 (페이지 텍스트 캐시 공유 → 이미 추출한 PDF 는 다시 파싱하지 않음)
+    with metrics.timer("extract_seconds", ext=".pdf"):
+        docs = pdf_cache.load_and_split(pdf_path)
+    print(f"PDF에서 {len(docs)}건 사례 추출")
 
-# [5] DB 생성/초기화 (최초 실행시)
-init_db("mng_db.sqlite3")
+    # [4] OpenAI LLM
+    os.environ.setdefault("OPENAI_API_KEY", "sk-")  # 본인키 입력!
+    llm = OpenAI(temperature=0.1)
 
-# [6] 사례별 분석 및 결과 저장
-results = []
-for doc in tqdm(docs, desc="분석중"):
-    text = doc.page_content.strip()
-    if not text:
-        continue
-    gekuk, explain, patt = db_gekuk_analyze(text)
-    if gekuk:
-        ai_text = f"[패턴DB] {gekuk} | {explain}"
-    else:
-        prompt = f"""아래 명리 사례(또는 문장)의 격국 및 규칙, 간단한 해설을 생성해줘.
+    # [5] DB 생성/초기화 (최초 실행시)
+    init_db(db_path)
+
+    # [6] 사례별 분석 및 결과 저장
+    results = []
+    for doc in tqdm(docs, desc="분석중"):
+        text = doc.page_content.strip()
+        if not text:
+            continue
+        with metrics.timer("pattern_match_seconds"):
+            gekuk, explain, patt = db_gekuk_analyze(text, db_path)
+        if gekuk:
+            metrics.inc("llm_cache_hits", source="pattern_db")
+            ai_text = f"[패턴DB] {gekuk} | {explain}"
+        else:
+            prompt = f"""아래 명리 사례(또는 문장)의 격국 및 규칙, 간단한 해설을 생성해줘.
 가능하다면 격국명, 핵심 규칙/패턴, 간단한 해설을 각각 1줄씩 출력:
 사례: {text}
 """
-        ai_text = llm(prompt)
-        patt = ""
-    results.append({
-        "원문": text,
-        "패턴격국": gekuk or "",
-        "패턴설명": explain or "",
-        "적중패턴": patt or "",
-        "AI해설": ai_text.strip()
-    })
+            metrics.inc("llm_calls", model="openai")
+            with metrics.timer("llm_seconds", model="openai"):
+                ai_text = llm(prompt)
+            patt = ""
+        results.append({
+            "원문": text,
+            "패턴격국": gekuk or "",
+            "패턴설명": explain or "",
+            "적중패턴": patt or "",
+            "AI해설": ai_text.strip()
+        })
+
+    # [7] 결과 파일로 저장
+    pd.DataFrame(results).to_csv(out_csv, index=False, encoding="utf-8-sig")
+    print(f"\n총 {len(results)}건 분석 완료! → {out_csv} 파일로 저장됨.")
+    print("계측 요약:", metrics.dump_summary("case_pattern"))
+    return results
 
-# [7] 결과 파일로 저장
-out_csv = "분석결과.csv"
-pd.DataFrame(results).to_csv(out_csv, index=False, encoding="utf-8-sig")
-print(f"\n총 {len(results)}건 분석 완료! → {out_csv} 파일로 저장됨.")
+if __name__ == "__main__":
+    run()
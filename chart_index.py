@@ -0,0 +1,192 @@
+# chart_index.py
+# 명식(사주 원국) 유사 사례 검색 — cases 전체를 고정 폭 코드 배열로 메모리에 두고 벡터화 top-k
+#  - 천간/지지: 연월일시 위치별 코드(0~9 / 0~11, 모르면 -1) → 위치 가중 해밍 일치
+#  - 오행 분포: 8글자의 목화토금수 개수(정규화) → 코사인
+#  - 공망: 12bit 지지 마스크 → Jaccard,  격국(structure_type): 같은 값이면 일치
+#  - 점수 = 질의에 있는 항목들의 가중 평균 (0~1). 쓰기(create/update/delete) 때 한 행씩 갱신,
+#    대량 입력 뒤에는 다음 검색 때 전체 재적재
+#
+#   index = ChartIndex()
+#   index.load(session.query(Case.case_id, Case.celestial_stems, Case.terrestrial_branches,
+#                            Case.structure_type, Case.empty_absence))
+#   index.search("甲丙戊庚", "子午辰戌", "관인상생", "申酉", k=10)   # [(case_id, score), ...]
+
+import threading
+
+import numpy as np
+
+import metrics
+from saju_calc import STEMS, BRANCHES
+
+STEMS_KO = "갑을병정무기경신임계"
+BRANCHES_KO = "자축인묘진사오미신유술해"
+STEM_CODE = {**{c: i for i, c in enumerate(STEMS)}, **{c: i for i, c in enumerate(STEMS_KO)}}
+BRANCH_CODE = {**{c: i for i, c in enumerate(BRANCHES)}, **{c: i for i, c in enumerate(BRANCHES_KO)}}
+
+# 오행 순서: 목 화 토 금 수
+STEM_ELEMENT = np.array([0, 0, 1, 1, 2, 2, 3, 3, 4, 4])
+BRANCH_ELEMENT = np.array([4, 2, 0, 0, 2, 1, 1, 2, 3, 3, 2, 4])
+
+# 위치 가중치 (연, 월, 일, 시): 일간과 월지(월령)를 더 무겁게
+STEM_WEIGHTS = np.array([1.0, 1.0, 2.0, 1.0], dtype=np.float32)
+BRANCH_WEIGHTS = np.array([1.0, 2.0, 1.0, 1.0], dtype=np.float32)
+ELEMENT_WEIGHT = 2.0
+EMPTY_WEIGHT = 1.0
+STRUCTURE_WEIGHT = 2.0
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(1 << 12)], dtype=np.float32)
+
+
+# --- 1. 인코딩 ---
+def _codes(text, table):
+    """문자열에서 간지 글자만 골라 앞 4개 코드 (부족하면 -1)."""
+    codes = [table[c] for c in (text or "") if c in table][:4]
+    return codes + [-1] * (4 - len(codes))
+
+
+def encode(celestial_stems="", terrestrial_branches="", structure_type="", empty_absence=""):
+    """사례 한 건 → (천간 코드[4], 지지 코드[4], 오행 분포[5], 공망 마스크, 격국 문자열)."""
+    stems = np.array(_codes(celestial_stems, STEM_CODE), dtype=np.int8)
+    branches = np.array(_codes(terrestrial_branches, BRANCH_CODE), dtype=np.int8)
+    elements = np.bincount(np.concatenate([STEM_ELEMENT[stems[stems >= 0]], BRANCH_ELEMENT[branches[branches >= 0]]]),
+                           minlength=5).astype(np.float32)
+    norm = np.linalg.norm(elements)
+    if norm:
+        elements /= norm
+    mask = 0
+    for c in empty_absence or "":
+        if c in BRANCH_CODE:
+            mask |= 1 << BRANCH_CODE[c]
+    return stems, branches, elements, mask, (structure_type or "").strip()
+
+
+# --- 2. 메모리 색인 ---
+class ChartIndex:
+    def __init__(self, capacity=1024):
+        self._lock = threading.Lock()
+        self._alloc(capacity)
+        self.size = 0
+        self.loaded = False       # False 이면 다음 검색 때 DB 에서 전체 적재
+        self._pos = {}            # case_id -> 행 위치
+        self._structures = {}     # 격국 문자열 -> 정수 코드 (0 = 없음)
+
+    def _alloc(self, capacity):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.stems = np.full((capacity, 4), -1, dtype=np.int8)
+        self.branches = np.full((capacity, 4), -1, dtype=np.int8)
+        self.elements = np.zeros((capacity, 5), dtype=np.float32)
+        self.empty = np.zeros(capacity, dtype=np.int16)
+        self.structure = np.zeros(capacity, dtype=np.int32)
+
+    def _grow(self):
+        old = (self.ids, self.stems, self.branches, self.elements, self.empty, self.structure)
+        self._alloc(len(self.ids) * 2)
+        for new, arr in zip((self.ids, self.stems, self.branches, self.elements, self.empty, self.structure), old):
+            new[:len(arr)] = arr
+
+    def _structure_code(self, name):
+        if not name:
+            return 0
+        return self._structures.setdefault(name, len(self._structures) + 1)
+
+    def _put(self, case_id, fields):
+        stems, branches, elements, mask, structure = encode(*fields)
+        pos = self._pos.get(case_id)
+        if pos is None:
+            if self.size == len(self.ids):
+                self._grow()
+            pos = self.size
+            self.size += 1
+            self._pos[case_id] = pos
+        self.ids[pos] = case_id
+        self.stems[pos] = stems
+        self.branches[pos] = branches
+        self.elements[pos] = elements
+        self.empty[pos] = mask
+        self.structure[pos] = self._structure_code(structure)
+
+    # --- 적재/갱신 ---
+    def load(self, rows):
+        """(case_id, 천간, 지지, 격국, 공망) 행 전체로 다시 적재. 적재한 사례 수 반환.
+        rows(지연 실행 query 도 가능)는 잠금 안에서 읽는다 → 적재 중의 upsert/remove 는 기다렸다가 스냅숏 위에 반영."""
+        with metrics.timer("chart_index_load_seconds"):
+            with self._lock:
+                rows = list(rows)
+                self._alloc(max(1024, len(rows)))
+                self.size = 0
+                self._pos = {}
+                self._structures = {}
+                for case_id, *fields in rows:
+                    self._put(case_id, fields)
+                self.loaded = True
+        return len(rows)
+
+    def upsert(self, case):
+        """Case 객체(또는 같은 속성을 가진 객체) 한 건 반영. 적재 전이면 무시(다음 적재에 포함)."""
+        with self._lock:
+            if self.loaded:
+                self._put(case.case_id, (case.celestial_stems, case.terrestrial_branches,
+                                         case.structure_type, case.empty_absence))
+
+    def remove(self, case_id):
+        """마지막 행을 빈자리로 옮겨 배열을 빈틈없이 유지."""
+        with self._lock:
+            pos = self._pos.pop(case_id, None)
+            if pos is None:
+                return
+            last = self.size - 1
+            if pos != last:
+                for arr in (self.ids, self.stems, self.branches, self.elements, self.empty, self.structure):
+                    arr[pos] = arr[last]
+                self._pos[int(self.ids[pos])] = pos
+            self.size = last
+
+    def invalidate(self):
+        """대량 입력 등 한 건씩 반영하기 어려운 쓰기 뒤에 호출 → 다음 검색 때 재적재."""
+        with self._lock:
+            self.loaded = False
+
+    # --- 검색 ---
+    def search(self, celestial_stems="", terrestrial_branches="", structure_type="", empty_absence="",
+               k=10, exclude=None):
+        """[(case_id, score)] 점수 내림차순. 일치하는 항목이 하나도 없는(0점) 사례와 exclude 는 빠진다."""
+        stems, branches, elements, mask, structure = encode(celestial_stems, terrestrial_branches,
+                                                            structure_type, empty_absence)
+        with self._lock, metrics.timer("chart_search_seconds"):
+            n = self.size
+            if n == 0:
+                return []
+            score = np.zeros(n, dtype=np.float32)
+            total = 0.0
+            known = stems >= 0
+            if known.any():
+                score += ((self.stems[:n] == stems) & known) @ STEM_WEIGHTS
+                total += float(STEM_WEIGHTS[known].sum())
+            known = branches >= 0
+            if known.any():
+                score += ((self.branches[:n] == branches) & known) @ BRANCH_WEIGHTS
+                total += float(BRANCH_WEIGHTS[known].sum())
+            if elements.any():
+                score += ELEMENT_WEIGHT * (self.elements[:n] @ elements)
+                total += ELEMENT_WEIGHT
+            if mask:
+                table = self.empty[:n].astype(np.int64)
+                union = _POPCOUNT[table | mask]
+                score += EMPTY_WEIGHT * np.divide(_POPCOUNT[table & mask], union, out=np.zeros(n, np.float32), where=union > 0)
+                total += EMPTY_WEIGHT
+            if structure:
+                code = self._structures.get(structure)
+                if code is not None:
+                    score += STRUCTURE_WEIGHT * (self.structure[:n] == code)
+                total += STRUCTURE_WEIGHT
+            if not total:
+                return []
+            score /= total
+            want = k
+            if exclude is not None and exclude in self._pos:
+                score[self._pos[exclude]] = -1.0
+                k += 1
+            k = min(k, n)
+            top = np.argpartition(-score, k - 1)[:k] if k < n else np.arange(n)
+            top = top[np.argsort(-score[top], kind="stable")]
+            return [(int(self.ids[i]), float(score[i])) for i in top if score[i] > 0][:want]
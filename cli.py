@@ -0,0 +1,189 @@
+# cli.py
+# mingli 통합 CLI. 모듈 최상단에는 표준 라이브러리만 두고, langchain/pandas/pdfplumber/konlpy 등
+# 무거운 의존성은 해당 하위 명령이 실행될 때만 import 한다 → `--help`, 패턴 조회는 즉시 응답.
+#
+#   python cli.py ingest Part_18._교육자.pdf            # 격국 분석 → mng_db.sqlite3
+#   python cli.py ingest a.pdf b.docx --queue           # 작업 큐에 등록 (python job_queue.py worker 로 처리)
+#   python cli.py index Book5_new.md --db-type FAISS    # 사례/규칙 블록 → 벡터 DB
+#   python cli.py search "甲日주에서 식신이 재를 생하면?" --k 3 --summary
+#   python cli.py patterns list | add <정규식> <격국> [설명] | match <문장>
+#   python cli.py terms terms.csv --threshold 0.5 --out similar_terms.csv
+#
+# 시작 시간 점검: python -m benchmarks.startup
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+DB_PATH = "mng_db.sqlite3"
+VECTOR_DB_DIR = "saju_vector_db"
+
+
+# --- 1. 하위 명령 ---
+def cmd_ingest(args):
+    if args.queue:
+        from job_queue import JobQueue
+        queue = JobQueue()
+        for path in args.files:
+            job_id = queue.submit("analyze_file", {"path": path, "db_path": args.db})
+            print(f"{path}: 작업 #{job_id} 등록")
+        return 0
+    from ai_manager import analyze_file
+    for path in args.files:
+        print(f"{path}: {analyze_file(path, args.db)}개 문장 분석 완료")
+    return 0
+
+
+def cmd_index(args):
+    if args.queue:
+        from job_queue import JobQueue
+        queue = JobQueue()
+        for path in args.files:
+            job_id = queue.submit("index_file", {"path": path, "db_dir": args.db_dir, "dedup": not args.no_dedup})
+            print(f"{path}: 작업 #{job_id} 등록")
+        return 0
+    from saju_embed_and_search_multi import extract_text, parse_cases
+    dedup = None
+    if not args.no_dedup:
+        from dedup_index import DedupIndex
+        # FAISS 는 이번 실행의 블록만으로 새로 만들므로 영속 dedup 기록(다른 실행의 대표 블록)을 쓰면
+        # 그쪽 사례가 색인에서 빠진다 → 이번 실행 안에서만 중복 제거
+        dedup = DedupIndex() if args.db_type == "Chroma" else DedupIndex(":memory:")
+    per_file = []
+    for path in args.files:
+        source = os.path.basename(path)
+        blocks = parse_cases(extract_text(path))
+        if dedup is not None:
+            blocks = dedup.filter_blocks(blocks, source=source, replace=True)
+        print(f"{path}: {len(blocks)}개 블록")
+        per_file.append((source, blocks))
+    total = sum(len(blocks) for _, blocks in per_file)
+    if args.db_type == "Chroma":
+        _index_chroma(per_file, args.db_dir, args.embed)
+    elif total:
+        from saju_embed_and_search_multi import embed_and_save
+        embed_and_save([b for _, blocks in per_file for b in blocks], args.db_dir, args.db_type, args.embed)
+    else:
+        print("색인할 블록이 없습니다.")
+        return 0
+    print(f"✅ {total}개 블록 저장: {args.db_dir}")
+    return 0
+
+
+def _index_chroma(per_file, db_dir, embed_type, batch_size=64):
+    """파일별로 "출처:순번" 고정 id 로 기록 (작업 큐 IndexFileJob 과 같은 방식) → 다시 실행해도 벡터가 늘지 않고,
+    블록 수가 줄면 남은 옛 벡터를 지운다."""
+    from saju_embed_and_search_multi import open_chroma, add_blocks, delete_source
+    db = open_chroma(db_dir, embed_type)
+    for source, blocks in per_file:
+        for start in range(0, len(blocks), batch_size):
+            add_blocks(db, blocks[start:start + batch_size], source, start)
+        delete_source(db, source, keep=len(blocks))
+    db.persist()
+
+
+def cmd_search(args):
+    from saju_embed_and_search_multi import search_vector, gpt_summary
+    results = search_vector(args.db_dir, args.query, args.db_type, args.embed, k=args.k)
+    for i, r in enumerate(results, 1):
+        print(f"\n{i}. {r.metadata.get('title', '')}\n{r.page_content[:500]}")
+    if args.summary and results:
+        print("\n🧠 요약:\n" + gpt_summary(args.query, results))
+    return 0
+
+
+def cmd_patterns(args):
+    # ai_manager 는 최상단에서 sqlite3/re 만 import 하므로 패턴 조회는 가볍다
+    from ai_manager import init_db, db_gekuk_analyze
+    init_db(args.db)
+    if args.action == "match":
+        gekuk, explain, patt = db_gekuk_analyze(args.text, args.db)
+        print(json.dumps({"gekuk": gekuk, "explain": explain, "pattern": patt}, ensure_ascii=False))
+        return 0 if gekuk else 1
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.action == "add":
+            cur = conn.execute("INSERT INTO patterns (pattern, gekuk, explain) VALUES (?, ?, ?)",
+                               (args.pattern, args.gekuk, args.explain))
+            conn.commit()
+            print(cur.lastrowid)
+        else:
+            for pid, patt, gekuk, explain in conn.execute("SELECT id, pattern, gekuk, explain FROM patterns ORDER BY id"):
+                print(f"{pid:5d}  {gekuk or '':10s}  {patt}  {explain or ''}")
+    finally:
+        conn.close()
+    return 0
+
+
+def cmd_terms(args):
+    import pandas as pd
+    from term_management_module import find_similar_terms
+    terms_df = pd.read_csv(args.csv)
+    pairs = find_similar_terms(terms_df, args.threshold)
+    out = pd.DataFrame(pairs, columns=["term1_id", "term2_id", "similarity"])
+    if args.out:
+        out.to_csv(args.out, index=False, encoding="utf-8-sig")
+        print(f"{len(out)}쌍 저장: {args.out}")
+    else:
+        print(out.to_string(index=False))
+    return 0
+
+
+# --- 2. 인자 파서 ---
+def build_parser():
+    p = argparse.ArgumentParser(prog="cli.py", description="mingli 통합 CLI (수집/색인/검색/패턴/용어)")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    s = sub.add_parser("ingest", help="문서 격국 분석 → mng_db")
+    s.add_argument("files", nargs="+")
+    s.add_argument("--db", default=DB_PATH)
+    s.add_argument("--queue", action="store_true", help="바로 실행하지 않고 작업 큐에 등록")
+    s.set_defaults(func=cmd_ingest)
+
+    s = sub.add_parser("index", help="문서 → 사례/규칙 블록 → 벡터 DB")
+    s.add_argument("files", nargs="+")
+    s.add_argument("--db-dir", default=VECTOR_DB_DIR)
+    s.add_argument("--db-type", default="Chroma", choices=["Chroma", "FAISS"])
+    s.add_argument("--embed", default="HF", choices=["HF", "OpenAI"])
+    s.add_argument("--no-dedup", action="store_true",
+                   help="근접 중복 제거(dedup_index) 생략. FAISS 는 전체를 새로 만들므로 이번 실행 파일끼리만 중복 제거")
+    s.add_argument("--queue", action="store_true", help="작업 큐에 등록 (Chroma 로만 색인)")
+    s.set_defaults(func=cmd_index)
+
+    s = sub.add_parser("search", help="벡터 DB 유사도 검색")
+    s.add_argument("query")
+    s.add_argument("--k", type=int, default=3)
+    s.add_argument("--db-dir", default=VECTOR_DB_DIR)
+    s.add_argument("--db-type", default="Chroma", choices=["Chroma", "FAISS"])
+    s.add_argument("--embed", default="HF", choices=["HF", "OpenAI"])
+    s.add_argument("--summary", action="store_true", help="검색 결과 LLM 요약 (MINGLI_LLM=fake 로 오프라인)")
+    s.set_defaults(func=cmd_search)
+
+    s = sub.add_parser("patterns", help="격국 패턴 테이블 조회/추가/매칭")
+    s.add_argument("--db", default=DB_PATH)
+    acts = s.add_subparsers(dest="action", required=True)
+    acts.add_parser("list")
+    a = acts.add_parser("add")
+    a.add_argument("pattern", help="정규식")
+    a.add_argument("gekuk")
+    a.add_argument("explain", nargs="?", default="")
+    acts.add_parser("match").add_argument("text")
+    s.set_defaults(func=cmd_patterns)
+
+    s = sub.add_parser("terms", help="용어 설명 유사도로 유사 용어 쌍 추출")
+    s.add_argument("csv", help="term_id, term, description 컬럼을 가진 CSV")
+    s.add_argument("--threshold", type=float, default=0.5)
+    s.add_argument("--out", help="결과 CSV 경로 (없으면 화면 출력)")
+    s.set_defaults(func=cmd_terms)
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# context_packer.py
+# gpt_summary 용 문맥 구성기
+#  - SimHash 로 거의 같은 문서(다른 책에 실린 같은 사례) 제거, 문장 단위 중복 제거
+#  - 질문과의 관련도(문자 2-gram 겹침) 순으로 문장을 골라 토큰 예산 안에서 채움
+#  - 기존 방식(doc.page_content[:1000] 이어붙이기) 대비 절약한 토큰 수 보고
+
+import math
+import os
+import re
+from functools import lru_cache
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("MINGLI_CONTEXT_TOKENS", "1500"))
+SIMHASH_BITS = 64
+SIMHASH_MAX_DISTANCE = 3   # 64비트 중 3비트 이하 차이면 같은 문서로 본다
+NAIVE_DOC_CHARS = 1000     # 기존 gpt_summary 의 문서당 잘라내기 길이
+
+_CJK = re.compile(r"[ᄀ-ᇿ㄰-㆏가-힯一-鿿㐀-䶿]")
+_SENT_SPLIT = re.compile(r"(?<=[.!?。])\s+|\n+")
+_NORMALIZE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+# --- 1. 토큰 수 세기 ---
+@lru_cache(maxsize=1)
+def _encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text):
+    """tiktoken 이 있으면 정확히, 없으면 근사치(한글/한자 1자≈1토큰, 그 외 4자≈1토큰)."""
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text))
+    cjk = len(_CJK.findall(text))
+    other = len(text) - cjk - text.count(" ") - text.count("\n")
+    return cjk + math.ceil(max(other, 0) / 4)
+
+
+# --- 2. 유사도 도구 ---
+def shingles(text, n=3):
+    """공백을 정리한 문자 n-gram 목록."""
+    text = " ".join(text.split())
+    if len(text) <= n:
+        return [text] if text else []
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+
+def _hash64(s):
+    # 프로세스마다 달라지는 hash() 대신 고정 해시 (FNV-1a 64bit)
+    h = 0xcbf29ce484222325
+    for b in s.encode("utf-8"):
+        h = ((h ^ b) * 0x100000001b3) & 0xFFFFFFFFFFFFFFFF
+    return h
+
+
+def simhash(text, n=3):
+    weights = [0] * SIMHASH_BITS
+    for sh in shingles(text, n):
+        h = _hash64(sh)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def split_sentences(text):
+    return [s.strip() for s in _SENT_SPLIT.split(text) if s and s.strip()]
+
+
+# --- 3. 문맥 구성 ---
+def pack_context(query, docs, budget=CONTEXT_TOKEN_BUDGET, max_distance=SIMHASH_MAX_DISTANCE):
+    """
+    docs: langchain Document 목록(또는 문자열). 검색 순위 순서라고 가정한다.
+    반환 dict: text, tokens, naive_tokens, saved_tokens, duplicates_removed, sentences_used, sentences_total
+    """
+    texts = [getattr(d, "page_content", d) for d in docs]
+    naive_tokens = count_tokens("\n\n".join(t[:NAIVE_DOC_CHARS] for t in texts))
+
+    # (1) 문서 단위 근접 중복 제거 — 먼저 나온(순위가 높은) 문서를 남긴다
+    kept, signatures, duplicates = [], [], 0
+    for t in texts:
+        sig = simhash(t)
+        if any(hamming(sig, s) <= max_distance for s in signatures):
+            duplicates += 1
+            continue
+        signatures.append(sig)
+        kept.append(t)
+
+    # (2) 문장 후보 + 관련도 점수, 문장 단위 중복 제거
+    query_grams = set(shingles(query, 2))
+    headers, candidates, seen = {}, [], set()
+    for di, t in enumerate(kept):
+        first, _, rest = t.partition("\n")
+        if first.startswith("["):  # "[사례] 제목" 머리줄은 문장 후보가 아니라 문서 표시로 쓴다
+            headers[di], body = first.strip(), rest
+        else:
+            headers[di], body = "", t
+        for si, sent in enumerate(split_sentences(body)):
+            key = _NORMALIZE.sub("", sent)
+            if not key:
+                continue
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            grams = set(shingles(sent, 2))
+            score = len(query_grams & grams) / math.sqrt(len(grams) or 1)
+            score += 0.1 / (1 + di) + 0.02 / (1 + si)  # 검색 순위·문서 앞부분 가산점
+            candidates.append((score, di, si, sent, count_tokens(sent)))
+
+    # (3) 점수 순으로 예산 안에서 선택
+    chosen, used = {}, 0
+    for score, di, si, sent, tokens in sorted(candidates, key=lambda c: -c[0]):
+        cost = tokens + 1
+        if di not in chosen and headers[di]:
+            cost += count_tokens(headers[di]) + 2
+        if used + cost > budget:
+            continue
+        chosen.setdefault(di, []).append((si, sent))
+        used += cost
+
+    # (4) 문서 순위, 문장 원래 순서대로 조립
+    parts = []
+    for di in sorted(chosen):
+        sents = " ".join(s for _, s in sorted(chosen[di]))
+        parts.append(f"{headers[di]}\n{sents}" if headers[di] else sents)
+    text = "\n\n".join(parts)
+    tokens = count_tokens(text)
+    return {
+        "text": text,
+        "tokens": tokens,
+        "naive_tokens": naive_tokens,
+        "saved_tokens": naive_tokens - tokens,
+        "duplicates_removed": duplicates,
+        "sentences_used": sum(len(v) for v in chosen.values()),
+        "sentences_total": len(candidates),
+    }
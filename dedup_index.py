@@ -0,0 +1,182 @@
+# dedup_index.py
+# 수집 단계의 근접 중복(같은 사례가 여러 책에 조금씩 다르게 실린 경우) 검출 — MinHash + LSH
+#  - 블록마다 MinHash 서명을 만들고 LSH 밴드 버킷으로 후보만 조회 (전체 비교 없이 준선형)
+#  - 같은 군집(cluster)의 첫 블록을 대표(canonical)로 남기고, 나머지는 출처 참조로만 기록
+#  - 서명/버킷/군집은 SQLite 에 저장되어 새 파일은 기존 색인에 대해 증분으로 검사
+#
+#   index = DedupIndex()
+#   new_blocks = index.filter_blocks(blocks, source="Book5_new.md")   # 임베딩할 대표 블록만
+#   index.sources(cluster_id)                                        # 같은 사례의 모든 출처
+#   index.remove("Book5_new.md")                                     # 파일 삭제 시 그 출처의 기록 삭제
+
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+
+from context_packer import shingles
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEDUP_DB_PATH = os.environ.get("MINGLI_DEDUP_DB", os.path.join(ROOT_DIR, "mingli_dedup.sqlite3"))
+NUM_PERM = 128
+BANDS, ROWS = 16, 8          # 16×8: 유사도 ~0.7 부근에서 후보 확률이 급격히 오름
+SHINGLE_SIZE = 4
+DEFAULT_THRESHOLD = 0.8      # 후보 중 추정 Jaccard 가 이 이상이면 같은 사례로 본다
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_rng = np.random.RandomState(1)  # 서명이 저장되므로 순열은 항상 같아야 한다
+_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+# --- 1. MinHash 서명 ---
+def block_text(block):
+    return f"{block.get('제목', '')}\n{block.get('내용', '')}"
+
+
+def minhash(text):
+    grams = set(shingles(text, SHINGLE_SIZE))
+    if not grams:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    hv = np.fromiter((int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little") for g in grams),
+                     dtype=np.uint64, count=len(grams))
+    with np.errstate(over="ignore"):
+        permuted = (np.outer(hv, _A) + _B) % _MERSENNE & _MAX_HASH
+    return permuted.min(axis=0)
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def jaccard(sig_a, sig_b):
+    """두 서명의 추정 Jaccard 유사도."""
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
+
+def band_keys(sig):
+    """밴드별 버킷 키 (SQLite INTEGER 범위의 부호 있는 64bit)."""
+    return [int.from_bytes(hashlib.blake2b(sig[b * ROWS:(b + 1) * ROWS].tobytes(), digest_size=8).digest(), "little", signed=True)
+            for b in range(BANDS)]
+
+
+# --- 2. 영속 색인 ---
+class DedupIndex:
+    def __init__(self, db_path=DEDUP_DB_PATH, threshold=DEFAULT_THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.conn = sqlite3.connect(db_path)
+        self.init_db()
+
+    def init_db(self):
+        c = self.conn
+        c.execute('''CREATE TABLE IF NOT EXISTS dedup_blocks (
+            block_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cluster_id INTEGER, source TEXT, title TEXT, content_hash TEXT,
+            signature BLOB, canonical INTEGER DEFAULT 0
+        )''')
+        c.execute('''CREATE TABLE IF NOT EXISTS dedup_bands (
+            band INTEGER, bucket INTEGER, block_id INTEGER
+        )''')
+        c.execute("CREATE INDEX IF NOT EXISTS ix_dedup_bands ON dedup_bands (band, bucket)")
+        c.execute("CREATE INDEX IF NOT EXISTS ix_dedup_blocks_hash ON dedup_blocks (content_hash, source)")
+        c.execute("CREATE INDEX IF NOT EXISTS ix_dedup_blocks_cluster ON dedup_blocks (cluster_id)")
+        c.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _candidates(self, keys):
+        ids = set()
+        for band, bucket in enumerate(keys):
+            ids.update(r[0] for r in self.conn.execute(
+                "SELECT block_id FROM dedup_bands WHERE band = ? AND bucket = ?", (band, bucket)))
+        return ids
+
+    def add(self, text, source, title=""):
+        """
+        블록 하나를 색인에 추가. (cluster_id, is_duplicate) 반환.
+        같은 출처에서 같은 내용을 다시 넣으면(재실행/재시작) 기존 기록을 그대로 돌려준다.
+        """
+        c = self.conn
+        digest = content_hash(text)
+        row = c.execute("SELECT cluster_id, canonical FROM dedup_blocks WHERE content_hash = ? AND source = ?",
+                        (digest, source)).fetchone()
+        if row:
+            return row[0], not row[1]
+
+        sig = minhash(text)
+        keys = band_keys(sig)
+        best_cluster, best_sim = None, 0.0
+        for block_id in self._candidates(keys):
+            cluster_id, blob = c.execute("SELECT cluster_id, signature FROM dedup_blocks WHERE block_id = ?",
+                                         (block_id,)).fetchone()
+            sim = jaccard(sig, np.frombuffer(blob, dtype=np.uint64))
+            if sim >= self.threshold and sim > best_sim:
+                best_cluster, best_sim = cluster_id, sim
+
+        is_duplicate = best_cluster is not None
+        cur = c.execute("INSERT INTO dedup_blocks (cluster_id, source, title, content_hash, signature, canonical) VALUES (?, ?, ?, ?, ?, ?)",
+                        (best_cluster, source, title, digest, sig.tobytes(), 0 if is_duplicate else 1))
+        block_id = cur.lastrowid
+        if not is_duplicate:
+            best_cluster = block_id  # 대표 블록 id 를 군집 id 로 사용
+            c.execute("UPDATE dedup_blocks SET cluster_id = ? WHERE block_id = ?", (block_id, block_id))
+        c.executemany("INSERT INTO dedup_bands (band, bucket, block_id) VALUES (?, ?, ?)",
+                      [(band, bucket, block_id) for band, bucket in enumerate(keys)])
+        return best_cluster, is_duplicate
+
+    def remove(self, source, keep=()):
+        """
+        출처의 블록 기록(서명, 밴드 버킷)을 삭제. keep 에 든 content_hash 의 블록은 남긴다.
+        대표 블록이 지워진 군집은 남은 블록 중 가장 먼저 들어온 것을 대표로 올린다
+        (그 블록은 해당 출처를 다시 색인할 때 임베딩된다). 삭제한 블록 수 반환.
+        """
+        c = self.conn
+        keep = set(keep)
+        rows = [r for r in c.execute("SELECT block_id, cluster_id, content_hash, canonical FROM dedup_blocks WHERE source = ?",
+                                     (source,)) if r[2] not in keep]
+        for block_id, *_ in rows:
+            c.execute("DELETE FROM dedup_bands WHERE block_id = ?", (block_id,))
+            c.execute("DELETE FROM dedup_blocks WHERE block_id = ?", (block_id,))
+        for cluster_id in {r[1] for r in rows if r[3]}:
+            c.execute("UPDATE dedup_blocks SET canonical = 1 WHERE block_id = "
+                      "(SELECT MIN(block_id) FROM dedup_blocks WHERE cluster_id = ?)", (cluster_id,))
+        c.commit()
+        return len(rows)
+
+    def dependents(self, source):
+        """source 의 블록이 대표인 군집에 중복으로만 기록된 다른 출처들. source 를 remove 하면 이 출처들의
+        블록이 대표로 올라오므로 다시 색인해야 그 사례가 검색에서 빠지지 않는다."""
+        return [r[0] for r in self.conn.execute(
+            "SELECT DISTINCT b.source FROM dedup_blocks c JOIN dedup_blocks b ON b.cluster_id = c.cluster_id "
+            "WHERE c.source = ? AND c.canonical = 1 AND b.source != ? ORDER BY b.source", (source, source))]
+
+    def filter_blocks(self, blocks, source, replace=False):
+        """
+        parse_cases 블록 목록 → 새 대표 블록만 반환 (각 블록에 "군집" id 를 붙임).
+        중복 블록은 색인에 출처로만 기록되고 결과에서 빠진다.
+        replace=True 이면 (같은 파일 재색인) 이번 블록 목록에 없는 그 출처의 옛 기록을 먼저 지운다.
+        """
+        if replace:
+            self.remove(source, keep={content_hash(block_text(b)) for b in blocks})
+        kept = []
+        for b in blocks:
+            cluster_id, is_duplicate = self.add(block_text(b), source, b.get("제목", ""))
+            if not is_duplicate:
+                kept.append(dict(b, 군집=cluster_id))
+        self.conn.commit()
+        return kept
+
+    def sources(self, cluster_id):
+        """군집에 속한 모든 (출처, 제목). 대표 블록이 먼저."""
+        return self.conn.execute(
+            "SELECT source, title FROM dedup_blocks WHERE cluster_id = ? ORDER BY canonical DESC, block_id",
+            (cluster_id,)).fetchall()
+
+    def stats(self):
+        blocks, clusters = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT cluster_id) FROM dedup_blocks").fetchone()
+        return {"blocks": blocks, "clusters": clusters, "duplicates": blocks - clusters}
@@ -3,20 +3,20 @@ import os
 import json
 import re
 from pathlib import Path
-import pdfplumber
-from langchain_community.vectorstores import Chroma, FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings, OpenAIEmbeddings
-from langchain.docstore.document import Document
+import metrics
+import pdf_cache
+# pdfplumber / langchain / dedup_index 는 무거우므로 쓰는 함수 안에서 import (cli.py 시작 속도)
 
 # 1. 문서 텍스트 추출
+@metrics.timed("extract_seconds", extractor="pdfplumber")
 def extract_text(file_path):
     ext = Path(file_path).suffix.lower()
     if ext == ".pdf":
-        with pdfplumber.open(file_path) as pdf_obj:
-            return "\n".join([page.extract_text() or "" for page in pdf_obj.pages])
+        return "\n".join(pdf_cache.get_pages(file_path, extractor="pdfplumber"))
     return Path(file_path).read_text(encoding="utf-8")
 
 # 2. 구조화: 사례/규칙 블록 추출
+@metrics.timed("parse_seconds")
 def parse_cases(text):
     pattern = re.split(r"(?:◉|<사례\s*\d+>|#\s*사례\s*\d+|사례\s*\d+|예시\s*\d+|■)", text)
     blocks = []
@@ -31,34 +31,59 @@ def parse_cases(text):
         blocks.append({"제목": title, "내용": body, "요약": summary, "구분": category})
     return blocks
 
+def _block_metadata(b):
+    # 근접 중복 제거(dedup_index)를 거친 블록은 군집 id 를 함께 저장 → 같은 사례의 다른 출처 조회용
+    meta = {"title": b["제목"]}
+    if "군집" in b:
+        meta["cluster_id"] = b["군집"]
+    return meta
+
 # 3. 임베딩 및 벡터 저장
-def embed_and_save(blocks, db_dir, db_type="Chroma", embed_type="HF"):
-    docs = [Document(page_content=f"[{b['구분']}] {b['제목']}\n{b['내용']}", metadata={"title": b["제목"]}) for b in blocks]
-    emb = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2") if embed_type == "HF" else OpenAIEmbeddings()
+def _embeddings(embed_type):
+    from langchain_community.embeddings import HuggingFaceEmbeddings, OpenAIEmbeddings
+    return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2") if embed_type == "HF" else OpenAIEmbeddings()
+
+def embed_and_save(blocks, db_dir, db_type="Chroma", embed_type="HF", emb=None):
+    from langchain.docstore.document import Document
+    docs = [Document(page_content=f"[{b['구분']}] {b['제목']}\n{b['내용']}", metadata=_block_metadata(b)) for b in blocks]
+    if emb is None:
+        emb = _embeddings(embed_type)
+    emb = metrics.timed_embeddings(emb, embed_type=embed_type)
+    metrics.inc("indexed_blocks", len(docs), db_type=db_type)
+    with metrics.timer("index_write_seconds", db_type=db_type):
+        _build_index(docs, emb, db_dir, db_type)
+    return db_dir
 
+def _build_index(docs, emb, db_dir, db_type):
+    from langchain_community.vectorstores import Chroma, FAISS
+    db = None
     if db_type == "Chroma":
         db = Chroma.from_documents(docs, emb, persist_directory=db_dir)
         db.persist()
     elif db_type == "FAISS":
         db = FAISS.from_documents(docs, emb)
         FAISS.save_local(db, db_dir)
-    return db_dir
+    return db
 
 # 4. 실행
 if __name__ == "__main__":
+    from dedup_index import DedupIndex
+
     files = [
         "C:/Users/oo/Desktop/new4/Book5_new.md",
         "C:/Users/oo/Desktop/new4/Part4 수암명리의 분석방법.md"
     ]
 
     all_blocks = []
+    dedup = DedupIndex()
     print("📂 문서 로딩 중...")
     for file_path in files:
         raw_text = extract_text(file_path)
         parsed_blocks = parse_cases(raw_text)
-        all_blocks.extend(parsed_blocks)
+        # 다른 책(또는 이전 실행)에 이미 실린 사례는 출처만 기록하고 제외
+        all_blocks.extend(dedup.filter_blocks(parsed_blocks, source=Path(file_path).name))
 
-    print(f"🔍 총 {len(all_blocks)}개 블록 구조화 완료")
+    print(f"🔍 총 {len(all_blocks)}개 블록 구조화 완료 (중복 현황: {dedup.stats()})")
     with open("saju_structured_all.json", "w", encoding="utf-8") as f:
         json.dump(all_blocks, f, ensure_ascii=False, indent=2)
 
@@ -67,3 +92,4 @@ if __name__ == "__main__":
     # 벡터 DB 저장
     db_output = embed_and_save(all_blocks, db_dir="saju_vector_db", db_type="Chroma", embed_type="HF")
     print(f"✅ 벡터 DB 저장 완료: {db_output}")
+    print("📊 계측 요약:", metrics.dump_summary("embed_and_search"))
@@ -0,0 +1,163 @@
+# export_parquet.py
+# mingli_analysis.db → 분석용 Parquet 스냅숏 (증분, 컬럼형, 타입 보존)
+#  - 테이블별 디렉터리 + 배치(batch=NNNNNN) 파티션. 각 배치는 직전 워터마크(기본키 최댓값) 이후 행만 담는다
+#  - 라이브 DB 는 읽기 전용으로 열고 커서 fetchmany 로 스트리밍 → ParquetWriter 로 바로 기록
+#  - 분석 측은 load_table()/open_dataset() 으로 memory-map 해서 읽는다 (라이브 DB 접근 없음)
+#
+#   python export_parquet.py                          # 증분 내보내기
+#   python export_parquet.py --full                   # 전체 다시 만들기 (수정/삭제 반영)
+#
+#   import export_parquet as ex
+#   cases = ex.load_table("cases")
+#   cases.group_by("structure_type").aggregate([("case_id", "count")])
+#
+# 주의: 테이블에 수정 시각 컬럼이 없어 워터마크는 기본키 기준이다. 이미 내보낸 행의 수정·삭제는
+#       증분에 반영되지 않으므로 주기적으로 --full 로 다시 만든다.
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DB_PATH = "mingli_analysis.db"
+SNAPSHOT_DIR = "mingli_snapshot"
+TABLES = ["cases", "analysis", "majorfortune", "wealthrules", "lukgod"]
+BATCH_ROWS = 50000
+MANIFEST = "_manifest.json"
+
+
+# --- 1. 스키마 ---
+def _arrow_type(decl):
+    decl = (decl or "").upper()
+    if "INT" in decl:
+        return pa.int64()
+    if any(t in decl for t in ("REAL", "FLOA", "DOUB", "NUMERIC", "DECIMAL")):
+        return pa.float64()
+    if "BLOB" in decl:
+        return pa.binary()
+    return pa.string()
+
+
+def table_schema(conn, table):
+    """PRAGMA table_info → (arrow 스키마, 기본키 컬럼명)."""
+    cols = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    if not cols:
+        return None, None
+    schema = pa.schema([pa.field(name, _arrow_type(decl), nullable=not pk) for _, name, decl, _, _, pk in cols])
+    pk = next((name for _, name, _, _, _, is_pk in cols if is_pk), "rowid")
+    return schema, pk
+
+
+# --- 2. 내보내기 ---
+def _load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_manifest(out_dir, manifest):
+    tmp = os.path.join(out_dir, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+
+
+def export_table(conn, table, out_dir, manifest, batch_rows=BATCH_ROWS, compression="zstd"):
+    """워터마크 이후 행을 새 배치 파티션 하나로 기록. 기록한 행 수 반환."""
+    schema, pk = table_schema(conn, table)
+    if schema is None:
+        return 0
+    state = manifest.setdefault(table, {"watermark": None, "batches": []})
+    batch_no = len(state["batches"]) + 1
+    part_dir = os.path.join(out_dir, table, f"batch={batch_no:06d}")
+    tmp_path = os.path.join(out_dir, table, f".batch={batch_no:06d}.parquet.tmp")
+    os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+
+    cur = conn.cursor()
+    cur.arraysize = batch_rows
+    columns = ", ".join(f'"{name}"' for name in schema.names)
+    if state["watermark"] is None:
+        cur.execute(f'SELECT {columns} FROM "{table}" ORDER BY "{pk}"')
+    else:
+        cur.execute(f'SELECT {columns} FROM "{table}" WHERE "{pk}" > ? ORDER BY "{pk}"', (state["watermark"],))
+
+    rows_written, first_pk, last_pk, writer = 0, None, None, None
+    pk_pos = schema.names.index(pk) if pk in schema.names else None
+    try:
+        while True:
+            rows = cur.fetchmany()
+            if not rows:
+                break
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, schema, compression=compression)
+            arrays = [pa.array([r[i] for r in rows], type=field.type) for i, field in enumerate(schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            rows_written += len(rows)
+            if pk_pos is not None:
+                first_pk = rows[0][pk_pos] if first_pk is None else first_pk
+                last_pk = rows[-1][pk_pos]
+    finally:
+        if writer is not None:
+            writer.close()
+    if not rows_written:
+        return 0
+
+    os.makedirs(part_dir, exist_ok=True)
+    os.replace(tmp_path, os.path.join(part_dir, "part-0.parquet"))
+    state["batches"].append({"batch": batch_no, "rows": rows_written, "min_pk": first_pk, "max_pk": last_pk,
+                             "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S")})
+    state["watermark"] = last_pk
+    return rows_written
+
+
+def export_snapshot(db_path=DB_PATH, out_dir=SNAPSHOT_DIR, tables=TABLES, full=False,
+                    batch_rows=BATCH_ROWS, compression="zstd"):
+    """{테이블: 새로 기록한 행 수} 반환."""
+    if full and os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        result = {}
+        for table in tables:
+            result[table] = export_table(conn, table, out_dir, manifest, batch_rows, compression)
+            _save_manifest(out_dir, manifest)  # 테이블마다 저장 → 중간에 실패해도 끝난 테이블은 유지
+        return result
+    finally:
+        conn.close()
+
+
+# --- 3. 읽기 (분석용) ---
+def open_dataset(table, out_dir=SNAPSHOT_DIR):
+    """테이블 전체(모든 배치)를 하나의 pyarrow Dataset 으로. batch 컬럼으로 파티션 필터 가능."""
+    return ds.dataset(os.path.join(out_dir, table), format="parquet", partitioning="hive")
+
+
+def load_table(table, out_dir=SNAPSHOT_DIR, columns=None):
+    """memory-map 으로 읽은 pyarrow Table. pandas 가 필요하면 .to_pandas()."""
+    return pq.read_table(os.path.join(out_dir, table), columns=columns, memory_map=True, partitioning="hive")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="mingli DB → Parquet 스냅숏")
+    p.add_argument("--db", default=DB_PATH)
+    p.add_argument("--out", default=SNAPSHOT_DIR)
+    p.add_argument("--tables", nargs="*", default=TABLES)
+    p.add_argument("--full", action="store_true", help="스냅숏을 지우고 처음부터 다시 내보내기")
+    p.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    p.add_argument("--compression", default="zstd", choices=["zstd", "snappy", "gzip", "none"])
+    args = p.parse_args()
+    start = time.perf_counter()
+    counts = export_snapshot(args.db, args.out, args.tables, args.full, args.batch_rows, args.compression)
+    for table, n in counts.items():
+        print(f"{table:14s} +{n:,} rows")
+    print(f"완료: {args.out} ({time.perf_counter() - start:.2f}s)")
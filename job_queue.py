@@ -0,0 +1,386 @@
+# job_queue.py
+# SQLite 기반의 내구성 있는 로컬 작업 큐 (장시간 수집/분석 작업용)
+#  - 작업(jobs) + 항목별 체크포인트(job_items): 재시작하면 끝난 항목은 건너뛰고 이어서 처리
+#  - 워커 스레드 풀, 전체/종류별 동시 실행 제한, 취소/재시도, 진행률·처리량 조회
+#
+#   python job_queue.py submit analyze_file '{"path": "Part_18._교육자.pdf"}'
+#   python job_queue.py worker --workers 2
+#   python job_queue.py status [job_id]
+
+import os, sys, json, time, sqlite3, socket, logging, threading, argparse
+import metrics
+
+log = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+JOBS_DB_PATH = os.environ.get("MINGLI_JOBS_DB", os.path.join(ROOT_DIR, "mingli_jobs.sqlite3"))
+STALE_SECONDS = 120          # heartbeat 가 이보다 오래된 running 작업은 재대기열로
+HEARTBEAT_SECONDS = 5
+KIND_LIMITS = {"analyze_file": 1, "index_file": 1}  # 종류별 동시 실행 수 (LLM/임베딩 자원 보호)
+
+STATUSES = ("queued", "running", "done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# --- 1. 작업 종류(핸들러) ---
+# 핸들러: params 로 생성 → item_keys() 로 처리 단위 목록 → process(key) 로 한 단위 처리.
+# item_keys 는 같은 입력에 대해 항상 같은 순서/키를 돌려줘야 재시작 시 이어서 처리할 수 있다.
+class AnalyzeFileJob:
+    """ai_manager.analyze_and_save 의 헤드리스 버전: 문장(페이지) 단위 격국 분석 → mng_db."""
+    kind = "analyze_file"
+
+    def __init__(self, params):
+        from ai_manager import extract_texts_from_file
+        self.path = params["path"]
+        self.db_path = params.get("db_path", "mng_db.sqlite3")
+        self.texts = extract_texts_from_file(self.path)
+        self._llm = None
+
+    def item_keys(self):
+        return [str(i) for i in range(len(self.texts))]
+
+    def process(self, key):
+        from ai_manager import analyze_text
+        if self._llm is None:
+            from langchain_community.llms import OpenAI
+            self._llm = OpenAI(temperature=0.1)
+        gekuk, _ = analyze_text(self.texts[int(key)], self._llm, self.db_path)
+        return {"gekuk": gekuk}
+
+
+class IndexFileJob:
+    """문서 → 사례/규칙 블록 → 벡터 DB(Chroma). 임베딩 배치 단위로 체크포인트."""
+    kind = "index_file"
+    batch_size = 64
+
+    def __init__(self, params):
+        from saju_embed_and_search_multi import extract_text, parse_cases
+        self.path = params["path"]
+        self.db_dir = params.get("db_dir", "saju_vector_db")
+        self.source = os.path.basename(self.path)
+        blocks = parse_cases(extract_text(self.path))
+        if params.get("dedup", True):
+            # 재시작해도 같은 출처의 블록은 같은 결과를 돌려주므로 배치 키가 유지된다
+            # (replace 는 이번 파일에 없는 옛 블록만 지우므로 재시작 때 다시 불려도 안전)
+            from dedup_index import DedupIndex, DEDUP_DB_PATH
+            index = DedupIndex(params.get("dedup_db", DEDUP_DB_PATH))
+            blocks = index.filter_blocks(blocks, self.source, replace=True)
+            index.close()
+        self.blocks = blocks
+        self._db = None
+
+    def item_keys(self):
+        # 블록이 없어도 한 번은 돌아 옛 벡터를 지운다
+        return [str(i) for i in range(0, len(self.blocks), self.batch_size)] or ["0"]
+
+    def process(self, key):
+        if self._db is None:
+            from langchain.vectorstores import Chroma
+            from langchain.embeddings import HuggingFaceEmbeddings
+            emb = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+            self._db = Chroma(persist_directory=self.db_dir, embedding_function=metrics.timed_embeddings(emb, embed_type="HF"))
+        from saju_embed_and_search_multi import add_blocks, delete_source
+        start = int(key)
+        batch = self.blocks[start:start + self.batch_size]
+        # id 가 고정이므로 중단 후 같은 배치를 다시 넣어도 중복되지 않는다
+        add_blocks(self._db, batch, self.source, start)
+        if start + self.batch_size >= len(self.blocks):
+            # 재색인으로 블록 수가 줄었으면 남은 옛 블록 삭제
+            delete_source(self._db, self.source, keep=len(self.blocks))
+        self._db.persist()
+        return {"blocks": len(batch)}
+
+
+HANDLERS = {h.kind: h for h in (AnalyzeFileJob, IndexFileJob)}
+
+
+# --- 2. 큐 저장소 ---
+class JobQueue:
+    def __init__(self, db_path=JOBS_DB_PATH):
+        self.db_path = db_path
+        self.init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_db(self):
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL, params TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'queued',
+            total INTEGER, done_items INTEGER DEFAULT 0, failed_items INTEGER DEFAULT 0,
+            attempts INTEGER DEFAULT 0, max_attempts INTEGER DEFAULT 3,
+            cancel_requested INTEGER DEFAULT 0, worker TEXT, error TEXT,
+            created_at REAL, started_at REAL, heartbeat_at REAL, finished_at REAL,
+            run_started_at REAL, run_start_items INTEGER DEFAULT 0
+        )''')
+        # 처리량은 이번 실행분만으로 계산 (재시작 전 항목/대기 시간 제외) — 예전 DB 에는 열을 추가
+        columns = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+        for name, decl in (("run_started_at", "REAL"), ("run_start_items", "INTEGER DEFAULT 0")):
+            if name not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {decl}")
+        conn.execute('''CREATE TABLE IF NOT EXISTS job_items (
+            job_id INTEGER NOT NULL, item_key TEXT NOT NULL,
+            status TEXT NOT NULL, result TEXT, error TEXT, updated_at REAL,
+            PRIMARY KEY (job_id, item_key)
+        )''')
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status, id)")
+        conn.close()
+
+    def submit(self, kind, params, max_attempts=3):
+        if kind not in HANDLERS:
+            raise ValueError(f"알 수 없는 작업 종류: {kind} (가능: {', '.join(HANDLERS)})")
+        if not isinstance(max_attempts, int) or max_attempts < 1:
+            raise ValueError(f"max_attempts 는 1 이상의 정수여야 합니다: {max_attempts!r}")
+        conn = self._connect()
+        cur = conn.execute("INSERT INTO jobs (kind, params, max_attempts, created_at) VALUES (?, ?, ?, ?)",
+                           (kind, json.dumps(params, ensure_ascii=False), max_attempts, time.time()))
+        conn.close()
+        metrics.inc("queue_jobs", kind=kind, event="submitted")
+        return cur.lastrowid
+
+    def get(self, job_id):
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        conn.close()
+        return _progress(row) if row else None
+
+    def list(self, status=None, limit=100):
+        conn = self._connect()
+        if status:
+            rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        conn.close()
+        return [_progress(r) for r in rows]
+
+    def cancel(self, job_id):
+        """대기 중이면 즉시 취소, 실행 중이면 다음 항목 경계에서 멈춘다."""
+        conn = self._connect()
+        conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                     (time.time(), job_id))
+        cur = conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running', 'cancelled')",
+                           (job_id,))
+        conn.close()
+        return cur.rowcount > 0
+
+    def retry(self, job_id):
+        """실패/취소된 작업을 다시 대기열에. 완료된 항목은 유지되고 실패 항목만 다시 처리."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute("""UPDATE jobs SET status = 'queued', attempts = 0, cancel_requested = 0, error = NULL,
+                              failed_items = 0, worker = NULL, finished_at = NULL
+                              WHERE id = ? AND status IN ('failed', 'cancelled')""", (job_id,))
+        if cur.rowcount:
+            conn.execute("DELETE FROM job_items WHERE job_id = ? AND status = 'failed'", (job_id,))
+        conn.execute("COMMIT")
+        conn.close()
+        return cur.rowcount > 0
+
+    def requeue_stale(self, max_age=STALE_SECONDS):
+        """죽은 워커가 잡고 있던 running 작업을 대기열로 되돌린다 (체크포인트는 유지)."""
+        conn = self._connect()
+        cur = conn.execute("UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND heartbeat_at < ?",
+                           (time.time() - max_age,))
+        conn.close()
+        return cur.rowcount
+
+    def claim(self, worker_id, kind_limits=KIND_LIMITS):
+        """대기 작업 하나를 원자적으로 점유. 종류별 동시 실행 제한을 넘는 작업은 건너뛴다."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            running = dict(conn.execute("SELECT kind, COUNT(*) FROM jobs WHERE status = 'running' GROUP BY kind").fetchall())
+            for row in conn.execute("SELECT id, kind FROM jobs WHERE status = 'queued' ORDER BY id").fetchall():
+                if running.get(row["kind"], 0) >= kind_limits.get(row["kind"], sys.maxsize):
+                    continue
+                now = time.time()
+                conn.execute("""UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1,
+                                started_at = COALESCE(started_at, ?), heartbeat_at = ?,
+                                run_started_at = ?, run_start_items = COALESCE(done_items, 0) WHERE id = ?""",
+                             (worker_id, now, now, now, row["id"]))
+                conn.execute("COMMIT")
+                return conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            conn.execute("COMMIT")
+            return None
+        finally:
+            conn.close()
+
+    # --- 실행 중 작업 갱신 (워커 전용) ---
+    def _done_keys(self, conn, job_id):
+        return {r[0] for r in conn.execute("SELECT item_key FROM job_items WHERE job_id = ? AND status = 'done'", (job_id,))}
+
+    def _checkpoint(self, conn, job_id, key, status, result=None, error=None):
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT OR REPLACE INTO job_items (job_id, item_key, status, result, error, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                     (job_id, key, status, json.dumps(result, ensure_ascii=False) if result is not None else None, error, now))
+        conn.execute("""UPDATE jobs SET heartbeat_at = ?,
+                        done_items = (SELECT COUNT(*) FROM job_items WHERE job_id = ? AND status = 'done'),
+                        failed_items = (SELECT COUNT(*) FROM job_items WHERE job_id = ? AND status = 'failed')
+                        WHERE id = ?""", (now, job_id, job_id, job_id))
+        conn.execute("COMMIT")
+
+    def run_job(self, row):
+        """점유한 작업 하나를 처리. 항목마다 체크포인트를 남긴다."""
+        job_id, kind = row["id"], row["kind"]
+        conn = self._connect()
+        stop_beat = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job_id, stop_beat), daemon=True).start()
+        try:
+            with metrics.timer("queue_job_setup_seconds", kind=kind):
+                handler = HANDLERS[kind](json.loads(row["params"]))
+                keys = handler.item_keys()
+            conn.execute("UPDATE jobs SET total = ? WHERE id = ?", (len(keys), job_id))
+            done = self._done_keys(conn, job_id)
+            for key in keys:
+                if key in done:
+                    continue
+                if conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]:
+                    raise JobCancelled()
+                try:
+                    with metrics.timer("queue_item_seconds", kind=kind):
+                        result = handler.process(key)
+                    self._checkpoint(conn, job_id, key, "done", result=result)
+                    metrics.inc("queue_items", kind=kind, status="done")
+                except Exception as e:
+                    self._checkpoint(conn, job_id, key, "failed", error=f"{type(e).__name__}: {e}")
+                    metrics.inc("queue_items", kind=kind, status="failed")
+            failed = conn.execute("SELECT failed_items, attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if failed["failed_items"] and failed["attempts"] < failed["max_attempts"]:
+                # 실패 항목만 다음 시도에서 다시 처리
+                conn.execute("DELETE FROM job_items WHERE job_id = ? AND status = 'failed'", (job_id,))
+                self._finish(conn, job_id, "queued", finished=False)
+            elif failed["failed_items"]:
+                self._finish(conn, job_id, "failed", f"{failed['failed_items']}개 항목 실패")
+            else:
+                self._finish(conn, job_id, "done")
+        except JobCancelled:
+            self._finish(conn, job_id, "cancelled")
+        except Exception as e:
+            attempts = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            status = "queued" if attempts[0] < attempts[1] else "failed"
+            self._finish(conn, job_id, status, f"{type(e).__name__}: {e}", finished=status != "queued")
+        finally:
+            stop_beat.set()
+            conn.close()
+
+    def _heartbeat(self, job_id, stop):
+        """긴 준비 단계(대용량 PDF 추출 등) 중에도 stale 로 오인되지 않도록 주기적으로 갱신."""
+        while not stop.wait(HEARTBEAT_SECONDS):
+            conn = self._connect()
+            conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'", (time.time(), job_id))
+            conn.close()
+
+    def _finish(self, conn, job_id, status, error=None, finished=True):
+        conn.execute("UPDATE jobs SET status = ?, error = ?, worker = NULL, finished_at = ? WHERE id = ?",
+                     (status, error, time.time() if finished else None, job_id))
+        kind = conn.execute("SELECT kind FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        metrics.inc("queue_jobs", kind=kind, event=status)
+
+
+def _progress(row):
+    """jobs 행 → 진행률/처리량/ETA 가 포함된 dict."""
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    total, done = job["total"], job["done_items"] or 0
+    job["progress"] = round(done / total, 4) if total else (1.0 if job["status"] == "done" else 0.0)
+    end = job["finished_at"] or job["heartbeat_at"]
+    start = job["run_started_at"] or job["started_at"]
+    elapsed = (end - start) if start and end else 0.0
+    run_done = done - (job["run_start_items"] or 0)
+    job["items_per_sec"] = round(run_done / elapsed, 3) if elapsed > 0 and run_done > 0 else None
+    remaining = (total - done) if total else None
+    job["eta_seconds"] = round(remaining / job["items_per_sec"], 1) if remaining and job["items_per_sec"] else None
+    return job
+
+
+# --- 3. 워커 풀 ---
+class WorkerPool:
+    """max_workers 개의 스레드가 큐를 폴링하며 작업을 처리."""
+
+    def __init__(self, queue, max_workers=2, poll_interval=1.0):
+        self.queue = queue
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.queue.requeue_stale()
+        for i in range(self.max_workers):
+            t = threading.Thread(target=self._loop, args=(f"{socket.gethostname()}:{os.getpid()}:{i}",),
+                                 name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+
+    def _loop(self, worker_id):
+        last_sweep = time.time()
+        while not self._stop.is_set():
+            try:
+                row = self.queue.claim(worker_id)
+                if row is None:
+                    if time.time() - last_sweep > STALE_SECONDS:
+                        self.queue.requeue_stale()
+                        last_sweep = time.time()
+                    self._stop.wait(self.poll_interval)
+                    continue
+                self.queue.run_job(row)
+            except Exception:
+                # DB 잠금 등으로 상태 기록에 실패해도 워커는 살아 있어야 한다.
+                # 상태를 못 남긴 running 작업은 heartbeat 가 멈추므로 requeue_stale 이 되돌린다.
+                log.exception("작업 워커 %s 오류", worker_id)
+                metrics.inc("queue_worker_errors")
+                self._stop.wait(self.poll_interval)
+
+
+# --- 4. 명령행 ---
+def main(argv=None):
+    p = argparse.ArgumentParser(description="mingli 작업 큐")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("submit", help="작업 등록")
+    s.add_argument("kind", choices=list(HANDLERS))
+    s.add_argument("params", help='JSON (예: {"path": "a.pdf"})')
+    s.add_argument("--max-attempts", type=int, default=3)
+    w = sub.add_parser("worker", help="워커 실행 (Ctrl+C 로 종료)")
+    w.add_argument("--workers", type=int, default=2)
+    st = sub.add_parser("status", help="작업 상태 조회")
+    st.add_argument("job_id", type=int, nargs="?")
+    for name in ("cancel", "retry"):
+        sub.add_parser(name).add_argument("job_id", type=int)
+    args = p.parse_args(argv)
+
+    queue = JobQueue()
+    if args.cmd == "submit":
+        print(queue.submit(args.kind, json.loads(args.params), args.max_attempts))
+    elif args.cmd == "worker":
+        pool = WorkerPool(queue, args.workers).start()
+        print(f"워커 {args.workers}개 실행 중 (DB: {queue.db_path})")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pool.stop()
+    elif args.cmd == "status":
+        out = queue.get(args.job_id) if args.job_id else queue.list()
+        print(json.dumps(out, ensure_ascii=False, indent=2))
+    elif args.cmd == "cancel":
+        print(queue.cancel(args.job_id))
+    elif args.cmd == "retry":
+        print(queue.retry(args.job_id))
+
+
+if __name__ == "__main__":
+    main()
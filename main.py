@@ -1,10 +1,17 @@
-from fastapi import FastAPI, HTTPException, Query
-from pydantic import BaseModel
-from typing import List, Optional
-from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey, CHAR
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+import codecs, csv, json
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Dict, List, Optional
+from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey, CHAR, and_, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import declarative_base, relationship, selectinload, sessionmaker
+import os
+import metrics
+from chart_index import ChartIndex
+from job_queue import JobQueue, WorkerPool, HANDLERS
 
-DB_PATH = "mingli_analysis.db"
+DB_PATH = os.environ.get("MINGLI_DB_PATH", "mingli_analysis.db")
 engine = create_engine(f"sqlite:///{DB_PATH}", echo=False, future=True)
 Base = declarative_base()
 Session = sessionmaker(bind=engine)
@@ -36,6 +43,16 @@ class Analysis(Base):
     case = relationship("Case", back_populates="analyses")
     applied_rule = relationship("WealthRules", back_populates="analyses")
 
+class MajorFortune(Base):
+    __tablename__ = "majorfortune"
+    fortune_id = Column(Integer, primary_key=True)
+    case_id = Column(Integer, ForeignKey("cases.case_id"))
+    age = Column(Integer)
+    celestial_stem = Column(CHAR(1))
+    terrestrial_branch = Column(CHAR(1))
+    fortune_analysis = Column(Text)
+    case = relationship("Case", back_populates="fortunes")
+
 class WealthRules(Base):
     __tablename__ = "wealthrules"
     rule_id = Column(Integer, primary_key=True)
@@ -82,9 +99,55 @@ class WealthRuleOut(WealthRuleCreate):
     class Config:
         orm_mode = True
 
+class AnalysisCreate(BaseModel):
+    case_id: int
+    analysis_type: Optional[str] = ""
+    description: Optional[str] = ""
+    applied_rule_id: Optional[int] = None
+    priority: Optional[int] = 0
+    note: Optional[str] = ""
+
+class MajorFortuneCreate(BaseModel):
+    case_id: int
+    age: int
+    celestial_stem: Optional[str] = ""
+    terrestrial_branch: Optional[str] = ""
+    fortune_analysis: Optional[str] = ""
+
+class AnalysisOut(AnalysisCreate):
+    analysis_id: int
+    class Config:
+        orm_mode = True
+
+class ChartQuery(BaseModel):
+    celestial_stems: Optional[str] = ""
+    terrestrial_branches: Optional[str] = ""
+    structure_type: Optional[str] = ""
+    empty_absence: Optional[str] = ""
+    k: int = Field(10, ge=1, le=100)
+
+class SimilarCase(BaseModel):
+    score: float
+    case: CaseOut
+    analyses: List[AnalysisOut] = []
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkResult(BaseModel):
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[BulkRowError] = []
+
 # --- FastAPI 앱 ---
 app = FastAPI()
 
+# 라우트별 지연시간/요청 수 계측 + GET /metrics (Prometheus)
+metrics.instrument_app(app)
+
 @app.post("/cases/", response_model=CaseOut)
 def create_case(case: CaseCreate):
     session = Session()
@@ -93,6 +156,7 @@ def create_case(case: CaseCreate):
     session.commit()
     session.refresh(obj)
     session.close()
+    chart_index.upsert(obj)
     return obj
 
 @app.get("/cases/", response_model=List[CaseOut])
@@ -115,6 +179,7 @@ def delete_case(case_id: int):
     session.delete(obj)
     session.commit()
     session.close()
+    chart_index.remove(case_id)
     return {"ok": True}
 
 @app.put("/cases/{case_id}", response_model=CaseOut)
@@ -129,8 +194,44 @@ def update_case(case_id: int, case: CaseCreate):
     session.commit()
     session.refresh(obj)
     session.close()
+    chart_index.upsert(obj)
     return obj
 
+# --- 명식 유사 사례 검색 (chart_index.py) ---
+# cases 의 천간/지지/격국/공망을 메모리 배열로 두고 가중 해밍/코사인으로 top-k.
+# 위의 생성/수정/삭제는 한 건씩 반영, 대량 입력 뒤에는 다음 검색 때 다시 적재한다.
+chart_index = ChartIndex()
+
+def _similar_cases(query, k, exclude=None):
+    session = Session()
+    try:
+        if not chart_index.loaded:
+            chart_index.load(session.query(Case.case_id, Case.celestial_stems, Case.terrestrial_branches,
+                                           Case.structure_type, Case.empty_absence))
+        hits = chart_index.search(query.celestial_stems, query.terrestrial_branches, query.structure_type,
+                                  query.empty_absence, k=k, exclude=exclude)
+        cases = {c.case_id: c for c in session.query(Case).options(selectinload(Case.analyses))
+                 .filter(Case.case_id.in_([case_id for case_id, _ in hits]))}
+        return [{"score": score, "case": cases[case_id], "analyses": list(cases[case_id].analyses)}
+                for case_id, score in hits if case_id in cases]
+    finally:
+        session.close()
+
+@app.get("/cases/{case_id}/similar", response_model=List[SimilarCase])
+def similar_to_case(case_id: int, k: int = Query(10, ge=1, le=100)):
+    session = Session()
+    obj = session.query(Case).filter_by(case_id=case_id).first()
+    session.close()
+    if not obj:
+        raise HTTPException(status_code=404, detail="Case not found")
+    query = ChartQuery(celestial_stems=obj.celestial_stems, terrestrial_branches=obj.terrestrial_branches,
+                       structure_type=obj.structure_type, empty_absence=obj.empty_absence)
+    return _similar_cases(query, k, exclude=case_id)
+
+@app.post("/cases/similar", response_model=List[SimilarCase])
+def similar_to_chart(query: ChartQuery):
+    return _similar_cases(query, query.k)
+
 # --- WealthRules(CRUD) ---
 @app.post("/rules/", response_model=WealthRuleOut)
 def create_rule(rule: WealthRuleCreate):
@@ -178,7 +279,268 @@ def update_rule(rule_id: int, rule: WealthRuleCreate):
     session.close()
     return obj
 
-# 기타: Analysis, MajorFortune 등도 같은 패턴으로 확장하면 OK
+# --- 대량 입력(Bulk create/upsert/import) ---
+# JSON 배열, NDJSON(한 줄에 객체 1개), CSV(첫 줄 헤더)를 받아
+# 청크 단위로 검증 → bulk_insert_mappings/bulk_update_mappings → 커밋.
+# upsert=true 이면 자연키(natural key)가 같은 기존 행을 갱신한다.
+BULK_CHUNK_SIZE = 500
+UPSERT_KEY_BATCH = 500  # 자연키 OR 조건 묶음 크기 (SQLite 식 트리 깊이 제한 1000 미만으로)
+
+BULK_TARGETS = {
+    "cases": (Case, CaseCreate, ("case_title", "birth_info")),
+    "rules": (WealthRules, WealthRuleCreate, ("rule_description",)),
+    "analyses": (Analysis, AnalysisCreate, ("case_id", "analysis_type", "applied_rule_id")),
+    "fortunes": (MajorFortune, MajorFortuneCreate, ("case_id", "age")),
+}
+
+# SQLite 외래 키 검사가 꺼져 있으므로 참조 대상이 있는지 청크마다 IN 조회로 확인한다
+BULK_FOREIGN_KEYS = {
+    "analyses": (("case_id", Case), ("applied_rule_id", WealthRules)),
+    "fortunes": (("case_id", Case),),
+}
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines")
+CSV_TYPES = ("text/csv", "application/csv")
+
+async def _iter_lines(request: Request):
+    """요청 본문을 스트리밍으로 읽어 한 줄씩(개행 포함) 돌려준다."""
+    buf = ""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in request.stream():
+        buf += decoder.decode(chunk)
+        *lines, buf = buf.split("\n")
+        for line in lines:
+            yield line + "\n"
+    buf += decoder.decode(b"", final=True)
+    if buf:
+        yield buf
+
+async def _iter_bulk_rows(request: Request):
+    """(행 번호, dict 또는 오류 메시지) 를 순서대로 돌려준다. 행 번호는 1부터."""
+    ctype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if ctype in NDJSON_TYPES:
+        row_no = 0
+        async for line in _iter_lines(request):
+            if not line.strip():
+                continue
+            row_no += 1
+            try:
+                yield row_no, json.loads(line)
+            except ValueError as e:
+                yield row_no, f"JSON 파싱 오류: {e}"
+    elif ctype in CSV_TYPES:
+        header, record, row_no = None, "", 0
+        async for line in _iter_lines(request):
+            record += line
+            # 따옴표 안의 개행은 다음 줄과 이어서 하나의 레코드로 처리
+            if record.count('"') % 2:
+                continue
+            if not record.strip():
+                record = ""
+                continue
+            values = next(csv.reader([record]))
+            record = ""
+            if header is None:
+                header = [h.strip() for h in values]
+                continue
+            row_no += 1
+            if len(values) != len(header):
+                yield row_no, f"CSV 컬럼 수 불일치: {len(values)} != {len(header)}"
+                continue
+            # 빈 칸은 스키마 기본값을 쓰도록 제외
+            yield row_no, {k: v for k, v in zip(header, values) if v != ""}
+        if record.strip():
+            yield row_no + 1, "CSV 레코드가 닫히지 않았습니다(따옴표 불일치)"
+    else:
+        try:
+            data = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="JSON 배열 본문이 필요합니다")
+        if not isinstance(data, list):
+            raise HTTPException(status_code=400, detail="JSON 배열 본문이 필요합니다")
+        for row_no, item in enumerate(data, 1):
+            yield row_no, item
+
+def _natural_key(mapping, key_fields):
+    return tuple(mapping.get(k) for k in key_fields)
+
+def _write_mappings(session, model, key_fields, rows, upsert):
+    """rows: [(행 번호, 검증된 스키마 객체)] 를 한 트랜잭션 안에서 기록. (inserted, updated) 반환.
+    삽입은 스키마 기본값까지 채우고, 갱신은 요청에 들어 있던 필드만 바꾼다."""
+    if not upsert:
+        session.bulk_insert_mappings(model, [obj.dict() for _, obj in rows])
+        return len(rows), 0
+    pk = model.__mapper__.primary_key[0]
+    key_cols = [getattr(model, k) for k in key_fields]
+    keys = list({_natural_key(obj.dict(), key_fields) for _, obj in rows})
+    existing = {}
+    for start in range(0, len(keys), UPSERT_KEY_BATCH):
+        batch = keys[start:start + UPSERT_KEY_BATCH]
+        for r in session.query(pk, *key_cols).filter(
+                or_(*[and_(*[c == v for c, v in zip(key_cols, key)]) for key in batch])):
+            existing.setdefault(tuple(r[1:]), r[0])
+    inserts, updates, updated = {}, {}, 0
+    for _, obj in rows:
+        m = obj.dict()
+        key = _natural_key(m, key_fields)
+        # 같은 청크 안의 중복 키는 나중 행이 이긴다 (새 키끼리 합쳐진 행은 삽입으로 센다)
+        if key in existing:
+            updates[key] = dict(updates.get(key, {}), **obj.dict(exclude_unset=True), **{pk.key: existing[key]})
+            updated += 1
+        else:
+            inserts[key] = m
+    if inserts:
+        session.bulk_insert_mappings(model, list(inserts.values()))
+    if updates:
+        session.bulk_update_mappings(model, list(updates.values()))
+    return len(rows) - updated, updated
+
+def _check_references(session, target, rows, result):
+    """참조하는 사례/규칙이 없는 행을 오류로 보고하고 나머지 행만 돌려준다."""
+    for field, ref_model in BULK_FOREIGN_KEYS.get(target, ()):
+        ref_pk = ref_model.__mapper__.primary_key[0]
+        values = list({getattr(obj, field) for _, obj in rows} - {None})
+        found = set()
+        for start in range(0, len(values), UPSERT_KEY_BATCH):
+            found.update(r[0] for r in session.query(ref_pk).filter(ref_pk.in_(values[start:start + UPSERT_KEY_BATCH])))
+        kept = []
+        for row_no, obj in rows:
+            value = getattr(obj, field)
+            if value is None or value in found:
+                kept.append((row_no, obj))
+            else:
+                result.failed += 1
+                result.errors.append(BulkRowError(row=row_no, error=f"{field}: {ref_model.__tablename__} 에 {value} 이(가) 없습니다"))
+        rows = kept
+    return rows
+
+def _write_chunk(target, rows, upsert, result):
+    model, _, key_fields = BULK_TARGETS[target]
+    session = Session()
+    try:
+        rows = _check_references(session, target, rows, result)
+        if not rows:
+            return
+        with metrics.timer("db_write_seconds", table=model.__tablename__):
+            inserted, updated = _write_mappings(session, model, key_fields, rows, upsert)
+            session.commit()
+        result.inserted += inserted
+        result.updated += updated
+    except SQLAlchemyError:
+        session.rollback()
+        # 청크 전체가 실패하면 행 단위로 다시 기록하여 실패한 행만 보고
+        for row_no, obj in rows:
+            try:
+                inserted, updated = _write_mappings(session, model, key_fields, [(row_no, obj)], upsert)
+                session.commit()
+                result.inserted += inserted
+                result.updated += updated
+            except SQLAlchemyError as e:
+                session.rollback()
+                result.failed += 1
+                result.errors.append(BulkRowError(row=row_no, error=str(e.orig if hasattr(e, "orig") else e)))
+    finally:
+        session.close()
+        if target == "cases":
+            chart_index.invalidate()
+
+async def _bulk_import(target, request, upsert, chunk_size):
+    _, schema, _ = BULK_TARGETS[target]
+    result = BulkResult()
+    chunk = []
+    async for row_no, raw in _iter_bulk_rows(request):
+        result.received += 1
+        if isinstance(raw, str):
+            error = raw
+        elif not isinstance(raw, dict):
+            error = "객체(dict) 형식이 아닙니다"
+        else:
+            try:
+                chunk.append((row_no, schema(**raw)))
+                error = None
+            except ValidationError as e:
+                error = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+        if error:
+            result.failed += 1
+            result.errors.append(BulkRowError(row=row_no, error=error))
+        if len(chunk) >= chunk_size:
+            await run_in_threadpool(_write_chunk, target, chunk, upsert, result)
+            chunk = []
+    if chunk:
+        await run_in_threadpool(_write_chunk, target, chunk, upsert, result)
+    return result
+
+@app.post("/cases/bulk", response_model=BulkResult)
+async def bulk_cases(request: Request, upsert: bool = Query(False, description="(제목, 생년정보)가 같으면 갱신"),
+                     chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000)):
+    return await _bulk_import("cases", request, upsert, chunk_size)
+
+@app.post("/rules/bulk", response_model=BulkResult)
+async def bulk_rules(request: Request, upsert: bool = Query(False, description="규칙 설명이 같으면 갱신"),
+                     chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000)):
+    return await _bulk_import("rules", request, upsert, chunk_size)
+
+@app.post("/analyses/bulk", response_model=BulkResult)
+async def bulk_analyses(request: Request, upsert: bool = Query(False, description="(사례, 분석유형, 적용규칙)이 같으면 갱신"),
+                        chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000)):
+    return await _bulk_import("analyses", request, upsert, chunk_size)
+
+@app.post("/fortunes/bulk", response_model=BulkResult)
+async def bulk_fortunes(request: Request, upsert: bool = Query(False, description="(사례, 나이)가 같으면 갱신"),
+                        chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000)):
+    return await _bulk_import("fortunes", request, upsert, chunk_size)
+
+# --- 장시간 수집 작업 큐 (job_queue.py) ---
+# 서버 기동 시 워커를 띄우고, 작업 등록/진행률 조회/취소/재시도를 API 로 제공
+JOB_WORKERS = int(os.environ.get("MINGLI_JOB_WORKERS", "2"))
+job_queue = JobQueue()
+job_workers = None
+
+class JobSubmit(BaseModel):
+    kind: str
+    params: Dict[str, Any]
+    max_attempts: int = Field(3, ge=1)
+
+@app.on_event("startup")
+def start_job_workers():
+    global job_workers
+    if JOB_WORKERS > 0:
+        job_workers = WorkerPool(job_queue, JOB_WORKERS).start()
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    if job_workers is not None:
+        job_workers.stop(timeout=5)
+
+@app.post("/jobs/")
+def submit_job(job: JobSubmit):
+    if job.kind not in HANDLERS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {job.kind}")
+    return job_queue.get(job_queue.submit(job.kind, job.params, job.max_attempts))
+
+@app.get("/jobs/")
+def list_jobs(status: Optional[str] = Query(None, description="queued/running/done/failed/cancelled"),
+              limit: int = Query(100, ge=1, le=1000)):
+    return job_queue.list(status, limit)
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: int):
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: int):
+    if not job_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job is not cancellable")
+    return job_queue.get(job_id)
+
+@app.post("/jobs/{job_id}/retry")
+def retry_job(job_id: int):
+    if not job_queue.retry(job_id):
+        raise HTTPException(status_code=409, detail="Only failed or cancelled jobs can be retried")
+    return job_queue.get(job_id)
 
 # --- 앱 실행 (명령행에서) ---
 # uvicorn main:app --reload
@@ -0,0 +1,210 @@
+# metrics.py
+# 가벼운 계측 모듈: 카운터/히스토그램/타이머 + Prometheus 텍스트 출력 + 실행별 JSON 요약
+# MINGLI_METRICS=0 이면 모든 함수가 즉시 반환되어 오버헤드가 거의 없다.
+
+import os, json, time, threading
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+ENABLED = os.environ.get("MINGLI_METRICS", "1") != "0"
+PREFIX = "mingli_"
+METRICS_DIR = os.environ.get("MINGLI_METRICS_DIR",
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics_runs"))
+
+# 초 단위 지연시간 버킷 (패턴 매칭 ~ LLM 호출까지 포괄)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_counters = {}    # name -> {labels: value}
+_histograms = {}  # name -> {labels: [bucket_counts, sum, count]}
+_NULL = nullcontext()
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# --- 1. 기록 함수 ---
+def inc(name, value=1, **labels):
+    """카운터 증가. name 은 접두사/접미사 없이 (예: "llm_calls")."""
+    if not ENABLED:
+        return
+    key = _labels(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """히스토그램에 값 하나 기록 (기본 단위: 초)."""
+    if not ENABLED:
+        return
+    key = _labels(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        h = series.get(key)
+        if h is None:
+            h = series[key] = [[0] * len(DEFAULT_BUCKETS), 0.0, 0]
+        for i, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                h[0][i] += 1
+        h[1] += value
+        h[2] += 1
+
+
+@contextmanager
+def _timer(name, labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def timer(name, **labels):
+    """with metrics.timer("extract_seconds", ext=".pdf"): ... — 비활성 시 no-op."""
+    if not ENABLED:
+        return _NULL
+    return _timer(name, labels)
+
+
+def timed(name, **labels):
+    """함수 전체 실행 시간을 기록하는 데코레이터."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _timer(name, labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+class _TimedEmbeddings:
+    """임베딩 객체를 감싸 embed_documents/embed_query 시간을 따로 기록."""
+
+    def __init__(self, emb, **labels):
+        self._emb = emb
+        self._labels = labels
+
+    def embed_documents(self, texts):
+        with timer("embedding_seconds", op="documents", **self._labels):
+            inc("embedded_texts", len(texts), **self._labels)
+            return self._emb.embed_documents(texts)
+
+    def embed_query(self, text):
+        with timer("embedding_seconds", op="query", **self._labels):
+            return self._emb.embed_query(text)
+
+    def __getattr__(self, attr):
+        return getattr(self._emb, attr)
+
+
+def timed_embeddings(emb, **labels):
+    return _TimedEmbeddings(emb, **labels) if ENABLED else emb
+
+
+def record_llm_usage(usage, **labels):
+    """OpenAI 응답의 usage(prompt/completion 토큰)를 카운터에 반영."""
+    if not ENABLED or usage is None:
+        return
+    get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, None)
+    for kind in ("prompt_tokens", "completion_tokens"):
+        n = get(kind)
+        if n:
+            inc("llm_tokens", n, kind=kind.split("_")[0], **labels)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# --- 2. 출력: Prometheus 텍스트 포맷 ---
+def _fmt_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('%s="%s"' % (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                    for k, v in pairs)
+    return "{" + body + "}"
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        for name, series in sorted(_counters.items()):
+            full = PREFIX + name + "_total"
+            lines.append(f"# TYPE {full} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{full}{_fmt_labels(key)} {value}")
+        for name, series in sorted(_histograms.items()):
+            full = PREFIX + name
+            lines.append(f"# TYPE {full} histogram")
+            for key, (buckets, total, count) in sorted(series.items()):
+                for bound, n in zip(DEFAULT_BUCKETS, buckets):
+                    lines.append(f"{full}_bucket{_fmt_labels(key, [('le', str(bound))])} {n}")
+                lines.append(f"{full}_bucket{_fmt_labels(key, [('le', '+Inf')])} {count}")
+                lines.append(f"{full}_sum{_fmt_labels(key)} {total}")
+                lines.append(f"{full}_count{_fmt_labels(key)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+# --- 3. 출력: 실행별 JSON 요약 ---
+def summary():
+    """{"counters": {...}, "timers": {name: [{labels, count, sum, mean}]}} 형태의 dict."""
+    out = {"counters": {}, "timers": {}}
+    with _lock:
+        for name, series in _counters.items():
+            out["counters"][name] = [{"labels": dict(k), "value": v} for k, v in series.items()]
+        for name, series in _histograms.items():
+            out["timers"][name] = [
+                {"labels": dict(k), "count": count, "sum": round(total, 6),
+                 "mean": round(total / count, 6) if count else 0.0}
+                for k, (_, total, count) in series.items()
+            ]
+    return out
+
+
+def dump_summary(run_name):
+    """METRICS_DIR/<run_name>_<시각>.json 으로 요약 저장. 저장 경로 반환 (비활성 시 None)."""
+    if not ENABLED:
+        return None
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"{run_name}_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary(), f, ensure_ascii=False, indent=2)
+    return path
+
+
+# --- 4. FastAPI 연동 ---
+def instrument_app(app):
+    """라우트별 지연시간/요청 수 미들웨어와 GET /metrics 를 app 에 등록.
+    "/" 정적 마운트처럼 모든 경로를 잡는 라우트보다 먼저 호출해야 /metrics 가 가려지지 않는다."""
+    from fastapi import Request
+    from fastapi.responses import PlainTextResponse
+
+    # 경로는 템플릿 기준: /cases/{case_id}
+    @app.middleware("http")
+    async def record_route_metrics(request: Request, call_next):
+        if not ENABLED:
+            return await call_next(request)
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            observe("http_request_seconds", time.perf_counter() - start, method=request.method, route=path)
+            inc("http_requests", method=request.method, route=path, status=status)
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def prometheus_metrics():
+        return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    return app
@@ -0,0 +1,184 @@
+# pdf_cache.py
+# PDF 페이지별 추출 텍스트 캐시 (내용 주소 기반) — 같은 PDF 를 파이프라인마다 다시 파싱하지 않는다
+#  - 키: (파일 SHA-256, 추출기, 페이지 번호). 파일 내용이 바뀌면 해시가 달라져 그 파일만 다시 추출
+#  - 페이지 텍스트는 zlib 압축해 SQLite(WAL) 한 파일에 저장 → 여러 프로세스/스레드가 함께 읽고 쓴다
+#  - 경로별 (크기, mtime) → 해시를 기억해 바뀌지 않은 파일은 해시도 다시 계산하지 않는다
+#
+#   import pdf_cache
+#   pages = pdf_cache.get_pages("Part_18._교육자.pdf", extractor="pdfplumber")   # 페이지별 문자열
+#   docs = pdf_cache.load_and_split("Part_18._교육자.pdf")                       # PyPDFLoader.load_and_split 대체
+#
+#   python pdf_cache.py warm *.pdf          # 미리 추출
+#   python pdf_cache.py stats
+#   python pdf_cache.py purge --days 30     # 오래 안 쓴 문서 삭제
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+import zlib
+
+import metrics
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))  # 실행 위치(cwd)와 무관하게 저장소 루트 기준
+PDF_CACHE_DB_PATH = os.environ.get("MINGLI_PDF_CACHE_DB", os.path.join(ROOT_DIR, "mingli_pdf_cache.sqlite3"))
+EXTRACTORS = ("pdfplumber", "pypdf")
+
+
+# --- 1. 추출기 ---
+def _extract_pdfplumber(path):
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+def _extract_pypdf(path):
+    from langchain_community.document_loaders import PyPDFLoader
+    return [doc.page_content for doc in PyPDFLoader(path).load()]
+
+
+_EXTRACT = {"pdfplumber": _extract_pdfplumber, "pypdf": _extract_pypdf}
+
+
+# --- 2. 저장소 ---
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute('''CREATE TABLE IF NOT EXISTS pdf_files (
+        path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, file_hash TEXT
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS pdf_docs (
+        file_hash TEXT, extractor TEXT, pages INTEGER, raw_bytes INTEGER, stored_bytes INTEGER,
+        extract_seconds REAL, created_at REAL, last_used REAL,
+        PRIMARY KEY (file_hash, extractor)
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS pdf_pages (
+        file_hash TEXT, extractor TEXT, page INTEGER, text BLOB,
+        PRIMARY KEY (file_hash, extractor, page)
+    )''')
+    return conn
+
+
+def file_hash(path, conn=None, chunk_size=1 << 20):
+    """파일 SHA-256. conn 을 주면 (크기, mtime) 이 같을 때 저장된 해시를 재사용."""
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    if conn is not None:
+        row = conn.execute("SELECT size, mtime_ns, file_hash FROM pdf_files WHERE path = ?", (key,)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    if conn is not None:
+        conn.execute("INSERT OR REPLACE INTO pdf_files (path, size, mtime_ns, file_hash) VALUES (?, ?, ?, ?)",
+                     (key, st.st_size, st.st_mtime_ns, digest))
+        conn.commit()
+    return digest
+
+
+def get_pages(path, extractor="pdfplumber", db_path=PDF_CACHE_DB_PATH):
+    """PDF 페이지별 텍스트 목록. 캐시에 있으면 압축만 풀고, 없으면 추출 후 저장."""
+    if extractor not in _EXTRACT:
+        raise ValueError(f"알 수 없는 추출기: {extractor} (가능: {', '.join(EXTRACTORS)})")
+    conn = _connect(db_path)
+    try:
+        digest = file_hash(path, conn)
+        if conn.execute("SELECT 1 FROM pdf_docs WHERE file_hash = ? AND extractor = ?", (digest, extractor)).fetchone():
+            rows = conn.execute("SELECT text FROM pdf_pages WHERE file_hash = ? AND extractor = ? ORDER BY page",
+                                (digest, extractor)).fetchall()
+            conn.execute("UPDATE pdf_docs SET last_used = ? WHERE file_hash = ? AND extractor = ?",
+                         (time.time(), digest, extractor))
+            conn.commit()
+            metrics.inc("pdf_cache_hits", extractor=extractor)
+            return [zlib.decompress(r[0]).decode("utf-8") for r in rows]
+
+        metrics.inc("pdf_cache_misses", extractor=extractor)
+        start = time.perf_counter()
+        pages = _EXTRACT[extractor](path)
+        elapsed = time.perf_counter() - start
+        metrics.observe("pdf_extract_seconds", elapsed, extractor=extractor)
+        raw = [p.encode("utf-8") for p in pages]
+        blobs = [zlib.compress(b, 6) for b in raw]
+        now = time.time()
+        with conn:  # 페이지와 완료 표시를 한 트랜잭션으로 → 중간에 죽으면 다음 실행이 다시 추출
+            conn.execute("DELETE FROM pdf_pages WHERE file_hash = ? AND extractor = ?", (digest, extractor))
+            conn.executemany("INSERT INTO pdf_pages (file_hash, extractor, page, text) VALUES (?, ?, ?, ?)",
+                             [(digest, extractor, i, b) for i, b in enumerate(blobs)])
+            conn.execute("INSERT OR REPLACE INTO pdf_docs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (digest, extractor, len(pages), sum(map(len, raw)), sum(map(len, blobs)), elapsed, now, now))
+        return pages
+    finally:
+        conn.close()
+
+
+def load_and_split(path, db_path=PDF_CACHE_DB_PATH):
+    """PyPDFLoader(path).load_and_split() 와 같은 Document 목록 (페이지 텍스트는 캐시에서)."""
+    from langchain.docstore.document import Document
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    pages = get_pages(path, "pypdf", db_path)
+    docs = [Document(page_content=text, metadata={"source": path, "page": i}) for i, text in enumerate(pages)]
+    return RecursiveCharacterTextSplitter().split_documents(docs)
+
+
+# --- 3. 관리 ---
+def stats(db_path=PDF_CACHE_DB_PATH):
+    conn = _connect(db_path)
+    try:
+        docs, pages, raw, stored, seconds = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(pages), 0), COALESCE(SUM(raw_bytes), 0), "
+            "COALESCE(SUM(stored_bytes), 0), COALESCE(SUM(extract_seconds), 0) FROM pdf_docs").fetchone()
+        return {"documents": docs, "pages": pages, "raw_bytes": raw, "stored_bytes": stored,
+                "extract_seconds": round(seconds, 2)}  # 캐시 적중 시 매번 아끼는 추출 시간
+    finally:
+        conn.close()
+
+
+def purge(days=30, db_path=PDF_CACHE_DB_PATH):
+    """days 일 넘게 쓰이지 않은 문서 캐시 삭제. 삭제한 문서 수 반환."""
+    cutoff = time.time() - days * 86400
+    conn = _connect(db_path)
+    try:
+        with conn:
+            old = conn.execute("SELECT file_hash, extractor FROM pdf_docs WHERE last_used < ?", (cutoff,)).fetchall()
+            for digest, extractor in old:
+                conn.execute("DELETE FROM pdf_pages WHERE file_hash = ? AND extractor = ?", (digest, extractor))
+                conn.execute("DELETE FROM pdf_docs WHERE file_hash = ? AND extractor = ?", (digest, extractor))
+            conn.execute("DELETE FROM pdf_files WHERE file_hash NOT IN (SELECT file_hash FROM pdf_docs)")
+        conn.execute("VACUUM")
+        return len(old)
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="PDF 페이지 텍스트 캐시")
+    p.add_argument("--db", default=PDF_CACHE_DB_PATH)
+    sub = p.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("warm", help="PDF 를 미리 추출해 캐시에 저장")
+    w.add_argument("files", nargs="+")
+    w.add_argument("--extractor", nargs="*", choices=EXTRACTORS, default=list(EXTRACTORS))
+    sub.add_parser("stats")
+    pu = sub.add_parser("purge", help="오래 쓰이지 않은 문서 삭제")
+    pu.add_argument("--days", type=float, default=30)
+    args = p.parse_args(argv)
+
+    if args.cmd == "warm":
+        for path in args.files:
+            for extractor in args.extractor:
+                start = time.perf_counter()
+                pages = get_pages(path, extractor, args.db)
+                print(f"{path} [{extractor}] {len(pages)}p {time.perf_counter() - start:.2f}s")
+    elif args.cmd == "stats":
+        print(stats(args.db))
+    elif args.cmd == "purge":
+        print(f"{purge(args.days, args.db)}개 문서 삭제")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
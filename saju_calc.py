@@ -0,0 +1,285 @@
+# saju_calc.py
+# 사주 4기둥 / 대운 / 祿神 일괄 계산 엔진 (NumPy 벡터화)
+#  - 60갑자·절기(節) 조견표를 미리 만들어 두고, 생년월일시 배열 전체를 한 번에 계산
+#  - 결과를 cases(celestial_stems/terrestrial_branches/major_fortune)·majorfortune 에 일괄 저장
+#
+#   python saju_calc.py --bench 100000        # 초당 계산 명식 수 측정
+#   python saju_calc.py --update-cases        # mingli_analysis.db 의 cases 중 명식이 비어 있는 사례 계산
+#   python saju_calc.py --update-cases --force  # 직접 입력한 명식/대운 요약도 계산값으로 덮어쓰기
+#
+# 절기 시각은 "寿星" 근사식(연도 끝 두 자리 × 0.2422 + 세기별 상수)으로 구한 날짜 단위 값이다.
+# 절입일 당일 출생은 절기 이후로 본다 (시각 단위 보정 없음). 출생 연도 지원 범위: 1900~2099년.
+
+import argparse
+import time
+
+import numpy as np
+
+STEMS = "甲乙丙丁戊己庚辛壬癸"
+BRANCHES = "子丑寅卯辰巳午未申酉戌亥"
+STEM_CHARS = np.array(list(STEMS))
+BRANCH_CHARS = np.array(list(BRANCHES))
+
+# --- 1. 조견표 ---
+# 60갑자: index i → (천간 i%10, 지지 i%12)
+SEXAGENARY_STEM = np.arange(60) % 10
+SEXAGENARY_BRANCH = np.arange(60) % 12
+SEXAGENARY = np.char.add(STEM_CHARS[SEXAGENARY_STEM], BRANCH_CHARS[SEXAGENARY_BRANCH])
+
+# 각 양력 월의 절(節) 상수: 小寒 立春 驚蟄 清明 立夏 芒種 小暑 立秋 白露 寒露 立冬 大雪
+_JIE_C_20 = np.array([6.11, 4.6295, 6.3826, 5.59, 6.318, 6.5, 7.928, 8.35, 8.44, 9.098, 8.218, 7.9])
+_JIE_C_21 = np.array([5.4055, 3.87, 5.63, 4.81, 5.52, 5.678, 7.108, 7.5, 7.646, 8.318, 7.438, 7.18])
+FIRST_YEAR, LAST_YEAR = 1899, 2100   # 표 범위 (전후 절기 조회용으로 1년씩 여유). 출생 연도는 1900~2099
+
+
+def _build_jie_table():
+    years = np.arange(FIRST_YEAR, LAST_YEAR + 1)[:, None]
+    y = years % 100
+    c = np.where(years < 2000, _JIE_C_20, _JIE_C_21)
+    # 1·2월(小寒·立春)은 윤년 보정에 전년도 기준 사용
+    leap = np.where(np.arange(12) < 2, (y - 1) // 4, y // 4)
+    return (np.floor(y * 0.2422 + c) - leap).astype(np.int64)
+
+
+JIE_DAY = _build_jie_table()   # [연도-FIRST_YEAR, 월-1] → 절입일(일)
+
+# 일간 → 祿神 지지 (甲寅 乙卯 丙戊巳 丁己午 庚申 辛酉 壬亥 癸子)
+LUK_BRANCH = np.array([2, 3, 5, 6, 5, 6, 8, 9, 11, 0])
+
+
+def _jie_date(year, month):
+    """(연, 월) 배열 → 그 달 절입일(datetime64[D]). 월은 0(전년 12월)~13(다음해 1월) 허용."""
+    year = year + (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    first = ((year - 1970) * 12 + (month - 1)).astype("datetime64[M]").astype("datetime64[D]")
+    return first + (JIE_DAY[year - FIRST_YEAR, month - 1] - 1)
+
+
+# --- 2. 계산 ---
+def compute_charts(birth, male, n_fortunes=8, late_zi_next_day=False):
+    """
+    birth: datetime64 배열(분 단위까지 사용), male: bool 배열(대운 순행/역행 판정).
+    반환 dict (모두 길이 N 또는 N×n_fortunes 배열):
+      year/month/day/hour_stem, *_branch (0부터 시작하는 인덱스),
+      fortune_start_age, fortune_stem, fortune_branch, fortune_age, luk_branch, luk_in_chart
+    late_zi_next_day=True 이면 23시 출생을 다음 날 일주로 본다 (야자시 미적용).
+    기본(야자시)은 23시 출생의 일주는 당일, 시주는 다음 날 子時로 본다.
+    한계: 절입은 날짜 단위 근사값이라 절입일 당일 출생은 모두 절기 이후로 본다. 절입 시각 이전에
+    태어난 경우 월주(절입이 立春이면 연주도)와 대운 시작 나이가 실제와 다를 수 있다 (표본의 약 2%).
+    """
+    birth = np.asarray(birth, dtype="datetime64[m]")
+    male = np.broadcast_to(np.asarray(male, dtype=bool), birth.shape)
+    day = birth.astype("datetime64[D]")
+    month_start = birth.astype("datetime64[M]")
+    years = birth.astype("datetime64[Y]").astype(np.int64) + 1970
+    months = month_start.astype(np.int64) % 12 + 1
+    dom = (day - month_start.astype("datetime64[D]")).astype(np.int64) + 1
+    hours = (birth - day).astype("timedelta64[h]").astype(np.int64)
+    if years.size and (years.min() <= FIRST_YEAR or years.max() >= LAST_YEAR):
+        raise ValueError(f"지원 범위({FIRST_YEAR + 1}~{LAST_YEAR - 1}년) 밖의 생년이 있습니다")
+
+    after_jie = dom >= JIE_DAY[years - FIRST_YEAR, months - 1]
+
+    # 연주: 立春 이전 출생은 전년도
+    saju_year = years - ((months < 2) | ((months == 2) & ~after_jie))
+    year_stem = (saju_year - 4) % 10
+    year_branch = (saju_year - 4) % 12
+
+    # 월주: 절입 전이면 전월. 1월 절입 전 → 子월(0), 12월 절입 후 → 子월
+    eff_month = months - ~after_jie
+    month_branch = eff_month % 12
+    month_stem = (year_stem % 5 * 2 + 2 + (month_branch - 2) % 12) % 10  # 五虎遁
+
+    # 일주: 1970-01-01 = 辛巳(17)
+    day_number = day.astype(np.int64)
+    if late_zi_next_day:
+        day_number = day_number + (hours == 23)
+    day_index = (day_number + 17) % 60
+    day_stem, day_branch = day_index % 10, day_index % 12
+
+    # 시주: 子時 23~01시, 五鼠遁. 야자시(23시, 일주는 당일)는 시간(時干)을 다음 날 일간 기준으로 정한다
+    hour_branch = (hours + 1) // 2 % 12
+    hour_day_stem = day_stem if late_zi_next_day else (day_stem + (hours == 23)) % 10
+    hour_stem = (hour_day_stem % 5 * 2 + hour_branch) % 10
+
+    # 대운: 양남음녀 순행, 음남양녀 역행. 출생~다음(이전) 절입까지 3일 = 1년
+    forward = (year_stem % 2 == 0) == male
+    this_jie = _jie_date(years, months)
+    next_jie = np.where(after_jie, _jie_date(years, months + 1), this_jie)
+    prev_jie = np.where(after_jie, this_jie, _jie_date(years, months - 1))
+    target = np.where(forward, next_jie, prev_jie).astype("datetime64[m]")
+    gap_days = np.abs((target - birth).astype(np.int64)) / 1440.0
+    start_age = np.clip(np.rint(gap_days / 3), 1, 10).astype(np.int64)
+
+    month_index = (6 * month_stem - 5 * month_branch) % 60
+    steps = np.arange(1, n_fortunes + 1)
+    fortune_index = (month_index[:, None] + np.where(forward, 1, -1)[:, None] * steps) % 60
+    fortune_age = start_age[:, None] + 10 * (steps - 1)
+
+    luk = LUK_BRANCH[day_stem]
+    chart_branches = np.stack([year_branch, month_branch, day_branch, hour_branch], axis=-1)
+
+    return {
+        "year_stem": year_stem, "year_branch": year_branch,
+        "month_stem": month_stem, "month_branch": month_branch,
+        "day_stem": day_stem, "day_branch": day_branch,
+        "hour_stem": hour_stem, "hour_branch": hour_branch,
+        "fortune_forward": forward, "fortune_start_age": start_age,
+        "fortune_stem": SEXAGENARY_STEM[fortune_index], "fortune_branch": SEXAGENARY_BRANCH[fortune_index],
+        "fortune_age": fortune_age,
+        "luk_branch": luk, "luk_in_chart": (chart_branches == luk[:, None]).any(axis=-1),
+    }
+
+
+def format_pillars(charts, has_time=None):
+    """("甲丙戊庚", "子午辰戌") 형식 문자열 배열 — cases.celestial_stems/terrestrial_branches 와 같은 순서(연월일시).
+    has_time 이 False 인 명식은 시주 자리를 비운다 ("甲丙戊", "子午辰")."""
+    stems = STEM_CHARS[charts["year_stem"]]
+    branches = BRANCH_CHARS[charts["year_branch"]]
+    for pos in ("month", "day", "hour"):
+        stems = np.char.add(stems, STEM_CHARS[charts[f"{pos}_stem"]])
+        branches = np.char.add(branches, BRANCH_CHARS[charts[f"{pos}_branch"]])
+    if has_time is not None:
+        stems = np.array([s if t else s[:3] for s, t in zip(stems.tolist(), has_time)])
+        branches = np.array([b if t else b[:3] for b, t in zip(branches.tolist(), has_time)])
+    return stems, branches
+
+
+def format_fortunes(charts):
+    """cases.major_fortune 요약 문자열: "3세 丁卯, 13세 戊辰, ..." """
+    names = np.char.add(STEM_CHARS[charts["fortune_stem"]], BRANCH_CHARS[charts["fortune_branch"]])
+    labels = np.char.add(np.char.add(charts["fortune_age"].astype(str), "세 "), names)
+    return [", ".join(row) for row in labels]
+
+
+def parse_birth_info(values):
+    """cases.birth_info 문자열 → (datetime64[m] 배열, male 배열, 유효 mask, 출생 시각 있음 mask).
+    "1990-01-01", "1990-01-01 13:30", "1990-01-01T13:30 여" 형식. 성별 표기(여/F)가 없으면 남성으로 본다.
+    날짜만 있으면 00:00 으로 계산하되 시각 없음으로 표시한다 (시주를 만들지 않도록)."""
+    births = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[m]")
+    male = np.ones(len(values), dtype=bool)
+    has_time = np.zeros(len(values), dtype=bool)
+    for i, v in enumerate(values):
+        parts = (v or "").replace("T", " ").split()
+        if not parts:
+            continue
+        if parts[-1] in ("여", "F", "f", "女"):
+            male[i] = False
+        fields = [p for p in parts[:2] if p[0].isdigit()]
+        try:
+            births[i] = np.datetime64("T".join(fields), "m")
+        except ValueError:
+            continue
+        has_time[i] = len(fields) == 2
+    ok = ~np.isnat(births)
+    return births, male, ok, has_time & ok
+
+
+# --- 3. DB 일괄 저장 ---
+def seed_lukgod(session):
+    """lukgod 테이블이 비어 있으면 10천간 祿神 매핑을 한 번에 등록."""
+    from mingli_db_manager import LukGod
+    if session.query(LukGod).count():
+        return 0
+    session.bulk_insert_mappings(LukGod, [
+        {"celestial_stem": STEMS[s], "terrestrial_branch": BRANCHES[b], "description": f"{STEMS[s]}의 祿神은 {BRANCHES[b]}"}
+        for s, b in enumerate(LUK_BRANCH)
+    ])
+    session.commit()
+    return len(LUK_BRANCH)
+
+
+def write_charts(session, case_ids, charts, has_time=None, force=False, replace_fortunes=True):
+    """
+    계산 결과를 cases 갱신 + majorfortune 일괄 삽입으로 저장 (한 트랜잭션). 갱신한 사례 수 반환.
+    명식(celestial_stems/terrestrial_branches)이 이미 입력된 사례는 force 가 아니면 건드리지 않는다.
+    majorfortune 은 이 엔진이 만든 행(fortune_analysis 가 빈 행)만 지우고 다시 넣으며, 해석이 적힌 행과
+    같은 나이의 대운은 새로 넣지 않는다.
+    """
+    from mingli_db_manager import Case, MajorFortune
+    case_ids = [int(c) for c in case_ids]
+    stems, branches = format_pillars(charts, has_time)
+    summaries = format_fortunes(charts)
+    existing = {r[0]: r[1:] for r in session.query(Case.case_id, Case.celestial_stems, Case.terrestrial_branches,
+                                                   Case.major_fortune).filter(Case.case_id.in_(case_ids))}
+    keep = [force or not any(existing.get(cid, ("", "", ""))[:2]) for cid in case_ids]
+    updates = []
+    for cid, s, b, f, write in zip(case_ids, stems.tolist(), branches.tolist(), summaries, keep):
+        if write:
+            row = {"case_id": cid, "celestial_stems": s, "terrestrial_branches": b}
+            if force or not existing.get(cid, ("", "", ""))[2]:
+                row["major_fortune"] = f[:200]
+            updates.append(row)
+    session.bulk_update_mappings(Case, updates)
+    written = [cid for cid, write in zip(case_ids, keep) if write]
+    if replace_fortunes and written:
+        session.query(MajorFortune).filter(
+            MajorFortune.case_id.in_(written),
+            (MajorFortune.fortune_analysis.is_(None)) | (MajorFortune.fortune_analysis == ""),
+        ).delete(synchronize_session=False)
+    annotated = set(session.query(MajorFortune.case_id, MajorFortune.age).filter(MajorFortune.case_id.in_(written)))
+    f_stems = STEM_CHARS[charts["fortune_stem"]].tolist()
+    f_branches = BRANCH_CHARS[charts["fortune_branch"]].tolist()
+    ages = charts["fortune_age"].tolist()
+    session.bulk_insert_mappings(MajorFortune, [
+        {"case_id": cid, "age": age, "celestial_stem": s, "terrestrial_branch": b, "fortune_analysis": ""}
+        for cid, row_s, row_b, row_a, write in zip(case_ids, f_stems, f_branches, ages, keep) if write
+        for s, b, age in zip(row_s, row_b, row_a) if (cid, age) not in annotated
+    ])
+    session.commit()
+    return len(written)
+
+
+def update_cases(session, chunk_size=5000, n_fortunes=8, force=False):
+    """birth_info 가 있는 cases 전체를 청크 단위로 재계산. 갱신한 사례 수 반환 (write_charts 참고)."""
+    from mingli_db_manager import Case
+    done, last_id = 0, 0
+    while True:
+        rows = (session.query(Case.case_id, Case.birth_info)
+                .filter(Case.case_id > last_id).order_by(Case.case_id).limit(chunk_size).all())
+        if not rows:
+            return done
+        last_id = rows[-1][0]
+        births, male, ok, has_time = parse_birth_info([r[1] for r in rows])
+        ids = np.array([r[0] for r in rows])[ok]
+        if len(ids):
+            done += write_charts(session, ids, compute_charts(births[ok], male[ok], n_fortunes),
+                                 has_time[ok], force=force)
+
+
+def random_births(n, seed=0):
+    rng = np.random.RandomState(seed)
+    start = np.datetime64("1930-01-01T00:00", "m").astype(np.int64)
+    end = np.datetime64("2020-12-31T23:59", "m").astype(np.int64)
+    return rng.randint(start, end, size=n).astype("datetime64[m]"), rng.rand(n) < 0.5
+
+
+def benchmark(n=100000, repeat=3):
+    births, male = random_births(n)
+    best = min(_timed(compute_charts, births, male) for _ in range(repeat))
+    return n / best
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(
+        description="사주 4기둥/대운/祿神 일괄 계산",
+        epilog="주의: 절입은 날짜 단위 근사값(시각 미반영)이다. 절입일 당일 절입 시각 전 출생은 "
+               "월주/연주가 다음 달(立春이면 다음 해)로 잡힐 수 있으므로 결과를 정밀 만세력으로 보지 말 것.")
+    p.add_argument("--bench", type=int, metavar="N", help="N개 명식 계산 속도 측정")
+    p.add_argument("--update-cases", action="store_true", help="cases.birth_info 기준으로 명식이 빈 사례 계산/저장")
+    p.add_argument("--force", action="store_true", help="--update-cases 에서 이미 입력된 명식/대운 요약도 덮어쓰기")
+    args = p.parse_args()
+    if args.bench:
+        print(f"{args.bench:,}개 명식: {benchmark(args.bench):,.0f} charts/s")
+    if args.update_cases:
+        from mingli_db_manager import Base, Session, engine
+        Base.metadata.create_all(engine)  # 기존 DB 에 lukgod/majorfortune 테이블이 없을 수 있다
+        session = Session()
+        print("祿神 등록:", seed_lukgod(session))
+        print("재계산 사례 수:", update_cases(session, force=args.force))
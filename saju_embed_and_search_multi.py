@@ -2,22 +2,23 @@
 import os
 import re
 import json
-import pdfplumber
-import pandas as pd
+import time
 from pathlib import Path
-from langchain.vectorstores import Chroma, FAISS
-from langchain.embeddings import HuggingFaceEmbeddings, OpenAIEmbeddings
-from langchain.docstore.document import Document
+import metrics
+import pdf_cache
+from context_packer import pack_context
+# pdfplumber / pandas / langchain / dedup_index 는 무거우므로 쓰는 함수 안에서 import (cli.py 시작 속도)
 
 # 📄 문서 → 텍스트
+@metrics.timed("extract_seconds", extractor="pdfplumber")
 def extract_text(file_path):
     ext = Path(file_path).suffix.lower()
     if ext == ".pdf":
-        with pdfplumber.open(file_path) as pdf:
-            return "\n".join([page.extract_text() or "" for page in pdf])
+        return "\n".join(pdf_cache.get_pages(file_path, extractor="pdfplumber"))
     return Path(file_path).read_text(encoding="utf-8")
 
 # 📘 텍스트 → 구조화
+@metrics.timed("parse_seconds")
 def parse_cases(text):
     pattern = re.split(r"(?:◉|<사례\s*\d+>|#\s*사례\s*\d+|사례\s*\d+|예시\s*\d+|■)", text)
     blocks = []
@@ -33,9 +34,54 @@ def parse_cases(text):
     return blocks
 
 # 💾 벡터 저장
-def embed_and_save(blocks, db_dir, db_type, embed_type):
-    docs = [Document(page_content=f"[{b['구분']}] {b['제목']}\n{b['내용']}", metadata={"title": b["제목"]}) for b in blocks]
-    emb = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2") if embed_type == "HF" else OpenAIEmbeddings()
+def _block_metadata(b):
+    # 근접 중복 제거(dedup_index)를 거친 블록은 군집 id 를 함께 저장 → 같은 사례의 다른 출처 조회용
+    meta = {"title": b["제목"]}
+    if "군집" in b:
+        meta["cluster_id"] = b["군집"]
+    return meta
+
+# Chroma 증분 색인: 업로드 색인(indexer)과 작업 큐(IndexFileJob)가 같은 id/메타데이터로 쓰도록 공용
+def add_blocks(db, blocks, source, start=0):
+    """blocks 를 source 의 start 번째 블록부터 기록. id 는 "출처:순번" 으로 고정 → 같은 배치를 다시 넣으면 덮어쓴다."""
+    if not blocks:
+        return
+    db.add_texts([f"[{b['구분']}] {b['제목']}\n{b['내용']}" for b in blocks],
+                 metadatas=[dict(_block_metadata(b), source=source) for b in blocks],
+                 ids=[f"{source}:{start + i}" for i in range(len(blocks))])
+
+def delete_source(db, source, keep=0):
+    """source 의 벡터 중 순번이 keep 이상인 것을 삭제 (파일 삭제는 0, 재색인으로 블록이 줄면 새 블록 수). 삭제 수 반환."""
+    ids = [i for i in db.get(where={"source": source})["ids"] if int(i.rpartition(":")[2]) >= keep]
+    if ids:
+        db.delete(ids=ids)
+    return len(ids)
+
+def _embeddings(embed_type):
+    from langchain.embeddings import HuggingFaceEmbeddings, OpenAIEmbeddings
+    return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2") if embed_type == "HF" else OpenAIEmbeddings()
+
+def open_chroma(db_dir, embed_type="HF", emb=None):
+    """증분 색인(add_blocks/delete_source)용으로 기존 Chroma DB 를 연다 (없으면 새로 만든다)."""
+    from langchain.vectorstores import Chroma
+    if emb is None:
+        emb = _embeddings(embed_type)
+    return Chroma(persist_directory=db_dir, embedding_function=metrics.timed_embeddings(emb, embed_type=embed_type))
+
+def embed_and_save(blocks, db_dir, db_type, embed_type, emb=None):
+    from langchain.docstore.document import Document
+    docs = [Document(page_content=f"[{b['구분']}] {b['제목']}\n{b['내용']}", metadata=_block_metadata(b)) for b in blocks]
+    if emb is None:
+        emb = _embeddings(embed_type)
+    emb = metrics.timed_embeddings(emb, embed_type=embed_type)
+    metrics.inc("indexed_blocks", len(docs), db_type=db_type)
+    with metrics.timer("index_write_seconds", db_type=db_type):
+        db = _build_index(docs, emb, db_dir, db_type)
+    return db
+
+def _build_index(docs, emb, db_dir, db_type):
+    from langchain.vectorstores import Chroma, FAISS
+    db = None
     if db_type == "Chroma":
         db = Chroma.from_documents(docs, emb, persist_directory=db_dir)
         db.persist()
@@ -45,39 +91,112 @@ def embed_and_save(blocks, db_dir, db_type, embed_type):
     return db
 
 # 🔍 유사도 검색
-def search_vector(db_dir, query, db_type, embed_type, k=3):
-    emb = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2") if embed_type == "HF" else OpenAIEmbeddings()
-    db = Chroma(persist_directory=db_dir, embedding_function=emb) if db_type == "Chroma" else FAISS.load_local(db_dir, emb)
-    return db.similarity_search(query, k=k)
+def search_vector(db_dir, query, db_type, embed_type, k=3, emb=None):
+    from langchain.vectorstores import Chroma, FAISS
+    if emb is None:
+        emb = _embeddings(embed_type)
+    emb = metrics.timed_embeddings(emb, embed_type=embed_type)
+    with metrics.timer("index_load_seconds", db_type=db_type):
+        if db_type == "Chroma":
+            db = Chroma(persist_directory=db_dir, embedding_function=emb)
+        else:
+            # FAISS 색인은 pickle 로 저장된다. embed_and_save 로 직접 만든 색인만 읽으므로 역직렬화를 허용
+            db = FAISS.load_local(db_dir, emb, allow_dangerous_deserialization=True)
+    with metrics.timer("search_seconds", db_type=db_type):
+        return db.similarity_search(query, k=k)
 
 # 🧠 GPT 요약 (옵션)
-def gpt_summary(query, docs):
-    import openai
-    combined = "\n\n".join([doc.page_content[:1000] for doc in docs])
-    prompt = f"""
+LLM_MODEL = "gpt-3.5-turbo"
+# MINGLI_LLM=fake 이면 네트워크 없이 프롬프트에서 만든 고정 응답을 스트리밍 (테스트/데모용)
+LLM_BACKEND = os.environ.get("MINGLI_LLM", "openai")
+
+def build_context(query, docs):
+    """중복 제거 + 관련 문장 선택으로 토큰 예산 안의 문맥 구성 (절약 토큰은 계측에 기록)."""
+    context = pack_context(query, docs)
+    metrics.inc("context_tokens", context["tokens"], kind="packed")
+    metrics.inc("context_tokens", context["naive_tokens"], kind="naive")
+    metrics.inc("context_duplicates_removed", context["duplicates_removed"])
+    return context
+
+def build_summary_prompt(query, docs, context=None):
+    context = context or build_context(query, docs)
+    return f"""
 사용자 질문: {query}
 아래는 관련된 사주 사례입니다. 격국, 제압 방식, 현실 해석을 요약해 주세요:
 
-{combined}
+{context["text"]}
 """
-    res = openai.ChatCompletion.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.5,
-    )
+
+def _fake_stream(prompt, delay=0.02):
+    """로컬 가짜 모델: 질문과 참고 사례 제목을 되짚는 답변을 토큰 단위로 흘려보낸다."""
+    lines = [l.strip() for l in prompt.splitlines() if l.strip()]
+    question = lines[0].replace("사용자 질문:", "").strip() if lines else ""
+    refs = [l for l in lines[2:] if l.startswith("[")][:3]
+    answer = f"'{question}'에 대한 요약입니다. " + (
+        "참고 사례: " + ", ".join(refs) + "." if refs else "참고할 사례를 찾지 못했습니다.")
+    for token in re.findall(r"\S+\s*", answer):
+        time.sleep(delay)
+        yield token
+
+def gpt_summary_stream(query, docs, context=None):
+    """gpt_summary 의 스트리밍 버전. 응답 토큰(문자열 조각)을 생성되는 대로 yield.
+    context 를 주면(build_context 결과) 문맥을 다시 만들지 않는다."""
+    prompt = build_summary_prompt(query, docs, context)
+    model = "fake" if LLM_BACKEND == "fake" else LLM_MODEL
+    metrics.inc("llm_calls", model=model)
+    start = time.perf_counter()
+    first = True
+    if LLM_BACKEND == "fake":
+        chunks = _fake_stream(prompt)
+    else:
+        import openai
+        response = openai.ChatCompletion.create(
+            model=LLM_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.5,
+            stream=True,
+        )
+        chunks = (c["choices"][0]["delta"].get("content") or "" for c in response)
+    for token in chunks:
+        if not token:
+            continue
+        if first:
+            metrics.observe("llm_ttft_seconds", time.perf_counter() - start, model=model)
+            first = False
+        yield token
+    metrics.observe("llm_seconds", time.perf_counter() - start, model=model)
+
+def gpt_summary(query, docs):
+    if LLM_BACKEND == "fake":
+        return "".join(gpt_summary_stream(query, docs)).strip()
+    import openai
+    prompt = build_summary_prompt(query, docs)
+    metrics.inc("llm_calls", model=LLM_MODEL)
+    with metrics.timer("llm_seconds", model=LLM_MODEL):
+        res = openai.ChatCompletion.create(
+            model=LLM_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.5,
+        )
+    metrics.record_llm_usage(res.get("usage"), model=LLM_MODEL)
     return res.choices[0].message.content.strip()
 
 # ✅ 실행 예시
 if __name__ == "__main__":
+    import pandas as pd
+    from dedup_index import DedupIndex
+
     files = ["case.json", "DB.pdf"]  # 여러 파일 지정
     all_blocks = []
+    dedup = DedupIndex()
     for file_path in files:
         print(f"📂 {file_path} 불러오는 중...")
         raw_text = extract_text(file_path)
         blocks = parse_cases(raw_text)
-        all_blocks.extend(blocks)
+        # 근접 중복 사례는 대표 블록 하나만 임베딩 (나머지 출처는 dedup 색인에 기록)
+        all_blocks.extend(dedup.filter_blocks(blocks, source=Path(file_path).name))
 
-    print(f"✅ 총 {len(all_blocks)}건 구조화됨")
+    print(f"✅ 총 {len(all_blocks)}건 구조화됨 (중복 현황: {dedup.stats()})")
     df = pd.DataFrame(all_blocks)
     df.to_csv("saju_structured_all.csv", index=False, encoding="utf-8-sig")
 
@@ -109,3 +228,5 @@ if __name__ == "__main__":
     if use_gpt:
         print("\n🧠 GPT 요약 결과:")
         print(gpt_summary(query, results))
+
+    print("📊 계측 요약:", metrics.dump_summary("saju_embed_and_search"))
@@ -1,9 +1,5 @@
 
-import pymysql
-from py2neo import Graph, Node, Relationship
-from konlpy.tag import Okt
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+# py2neo / konlpy(JVM) / sklearn 은 import 비용이 커서 쓰는 함수 안에서 import (cli.py 시작 속도)
 
 # 1. Insert Category
 def insert_category(cursor, name, level=1, parent_id=None, description=None):
@@ -42,6 +38,7 @@ def link_tag_to_term(cursor, term_id, tag_name):
 
 # 5. Sync Terms to Neo4j
 def sync_terms_to_neo4j(graph, terms_df, relations_df):
+    from py2neo import Node, Relationship
     graph.delete_all()
     term_nodes = {}
     for _, term in terms_df.iterrows():
@@ -61,8 +58,13 @@ def sync_terms_to_neo4j(graph, terms_df, relations_df):
         graph.create(rel_node)
 
 # 6. NLP-based Similar Term Extraction
-def extract_and_store_similar_terms(conn, terms_df, threshold=0.5):
-    okt = Okt()
+def find_similar_terms(terms_df, threshold=0.5, okt=None):
+    """설명 명사 TF-IDF 코사인 유사도가 threshold 이상인 (term1_id, term2_id, score) 목록."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    if okt is None:
+        from konlpy.tag import Okt
+        okt = Okt()
     terms_df['nouns'] = terms_df['description'].apply(lambda x: [n for n in okt.nouns(x) if len(n) > 1])
     terms_df['noun_text'] = terms_df['nouns'].apply(lambda x: ' '.join(x))
 
@@ -70,21 +72,22 @@ def extract_and_store_similar_terms(conn, terms_df, threshold=0.5):
     tfidf_matrix = tfidf.fit_transform(terms_df['noun_text'])
     sim_matrix = cosine_similarity(tfidf_matrix)
 
-    cursor = conn.cursor()
+    pairs = []
     for i in range(len(terms_df)):
         for j in range(i + 1, len(terms_df)):
             sim_score = sim_matrix[i, j]
             if sim_score >= threshold:
-                query = """
-                INSERT INTO TermRelations (term1_id, term2_id, relation_type, relation_subtype, strength, description)
-                VALUES (%s, %s, 'similarity', 'auto-detected', %s, %s)
-                """
-                cursor.execute(query, (
-                    terms_df.loc[i, 'term_id'],
-                    terms_df.loc[j, 'term_id'],
-                    sim_score,
-                    f"자동 감지된 유사도: {sim_score:.2f}"
-                ))
+                pairs.append((terms_df.loc[i, 'term_id'], terms_df.loc[j, 'term_id'], sim_score))
+    return pairs
+
+def extract_and_store_similar_terms(conn, terms_df, threshold=0.5, okt=None):
+    cursor = conn.cursor()
+    for term1_id, term2_id, sim_score in find_similar_terms(terms_df, threshold, okt):
+        query = """
+        INSERT INTO TermRelations (term1_id, term2_id, relation_type, relation_subtype, strength, description)
+        VALUES (%s, %s, 'similarity', 'auto-detected', %s, %s)
+        """
+        cursor.execute(query, (term1_id, term2_id, sim_score, f"자동 감지된 유사도: {sim_score:.2f}"))
     conn.commit()
     cursor.close()
 
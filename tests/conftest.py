@@ -0,0 +1,28 @@
+# 테스트는 저장소 안의 DB/색인을 건드리지 않도록 모든 경로를 임시 디렉터리로 돌린다.
+# (main.py 등은 import 시점에 경로를 읽으므로 import 전에 설정)
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP = tempfile.mkdtemp(prefix="mingli_test_")
+os.environ.update({
+    "MINGLI_DB_PATH": os.path.join(TMP, "mingli_analysis.db"),
+    "MINGLI_JOBS_DB": os.path.join(TMP, "mingli_jobs.sqlite3"),
+    "MINGLI_JOB_WORKERS": "0",
+    "MINGLI_DEDUP_DB": os.path.join(TMP, "mingli_dedup.sqlite3"),
+    "MINGLI_PDF_CACHE_DB": os.path.join(TMP, "mingli_pdf_cache.sqlite3"),
+    "MINGLI_INDEX_DIR": os.path.join(TMP, "saju_vector_db"),
+    "MINGLI_LLM": "fake",
+})
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import main
+    return TestClient(main.app)
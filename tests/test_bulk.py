@@ -0,0 +1,48 @@
+def test_upsert_updates_only_sent_fields(client):
+    row = {"case_title": "부분 갱신", "birth_info": "1990-01-01", "celestial_stems": "甲丙戊庚",
+           "terrestrial_branches": "子午辰戌", "structure_type": "관인상생"}
+    assert client.post("/cases/bulk", json=[row]).json()["inserted"] == 1
+
+    patch = {"case_title": "부분 갱신", "birth_info": "1990-01-01", "structure_type": "식신생재"}
+    result = client.post("/cases/bulk?upsert=true", json=[patch]).json()
+    assert result["updated"] == 1 and result["failed"] == 0
+
+    case = next(c for c in client.get("/cases/", params={"q": "부분 갱신"}).json())
+    assert case["structure_type"] == "식신생재"
+    assert case["celestial_stems"] == "甲丙戊庚"
+    assert case["terrestrial_branches"] == "子午辰戌"
+
+
+def test_upsert_large_chunk_uses_batched_key_lookup(client):
+    rows = [{"case_title": f"대량 {i}", "birth_info": "2000-01-01"} for i in range(1500)]
+    assert client.post("/cases/bulk?chunk_size=2000", json=rows).json()["inserted"] == 1500
+
+    for r in rows:
+        r["structure_type"] = "건록격"
+    result = client.post("/cases/bulk?upsert=true&chunk_size=2000", json=rows).json()
+    assert result == {"received": 1500, "inserted": 0, "updated": 1500, "failed": 0, "errors": []}
+
+
+def test_bulk_fortunes_reject_missing_case(client):
+    case_id = client.post("/cases/", json={"case_title": "대운 대상", "birth_info": "1990-01-01"}).json()["case_id"]
+    rows = [{"case_id": case_id, "age": 3}, {"case_id": 999999, "age": 13}]
+    result = client.post("/fortunes/bulk", json=rows).json()
+    assert (result["inserted"], result["failed"]) == (1, 1)
+    assert result["errors"][0]["row"] == 2 and "case_id" in result["errors"][0]["error"]
+
+
+def test_bulk_analyses_reject_missing_rule(client):
+    case_id = client.post("/cases/", json={"case_title": "분석 대상", "birth_info": "1990-01-01"}).json()["case_id"]
+    rows = [{"case_id": case_id, "analysis_type": "격국"}, {"case_id": case_id, "applied_rule_id": 999999}]
+    result = client.post("/analyses/bulk", json=rows).json()
+    assert (result["inserted"], result["failed"]) == (1, 1)
+    assert "applied_rule_id" in result["errors"][0]["error"]
+
+
+def test_upsert_merges_new_duplicate_keys_as_insert(client):
+    rows = [{"case_title": "청크 내 중복", "birth_info": "1991-01-01", "structure_type": "건록격"},
+            {"case_title": "청크 내 중복", "birth_info": "1991-01-01", "structure_type": "양인격"}]
+    result = client.post("/cases/bulk?upsert=true", json=rows).json()
+    assert (result["inserted"], result["updated"]) == (2, 0)
+    cases = client.get("/cases/", params={"q": "청크 내 중복"}).json()
+    assert [c["structure_type"] for c in cases] == ["양인격"]
@@ -0,0 +1,26 @@
+from chart_index import ChartIndex
+
+
+def _index():
+    index = ChartIndex()
+    index.load([(1, "甲丙戊庚", "子午辰戌", "관인상생", "申酉"),
+                (2, "乙丁己辛", "丑未巳亥", "", ""),
+                (3, "", "", "", "")])  # 명식 미입력 사례
+    return index
+
+
+def test_search_drops_zero_score_cases():
+    hits = _index().search("甲丙戊庚", "子午辰戌", k=10)
+    assert [case_id for case_id, _ in hits] == [1, 2]
+    assert all(score > 0 for _, score in hits)
+    assert _index().search(structure_type="종격", k=10) == []
+
+
+def test_search_excludes_query_case():
+    assert [case_id for case_id, _ in _index().search("甲丙戊庚", "子午辰戌", k=1, exclude=1)] == [2]
+
+
+def test_similar_chart_rejects_out_of_range_k(client):
+    for k in (0, 101, "many"):
+        assert client.post("/cases/similar", json={"celestial_stems": "甲", "k": k}).status_code == 422
+    assert client.post("/cases/similar", json={"celestial_stems": "甲", "k": 5}).status_code == 200
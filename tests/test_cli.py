@@ -0,0 +1,38 @@
+import cli
+import saju_embed_and_search_multi as multi
+
+CASES = "사례 1 식신생재\n甲木 일간이 丙火 식신으로 戊土 재성을 생한다.\n사례 2 관인상생\n관성이 인성을 생하고 인성이 일간을 돕는다.\n"
+
+
+class FakeChroma:
+    def __init__(self):
+        self.rows = {}
+
+    def add_texts(self, texts, metadatas, ids):
+        self.rows.update(zip(ids, metadatas))
+
+    def get(self, where):
+        return {"ids": [i for i, m in self.rows.items() if m["source"] == where["source"]]}
+
+    def delete(self, ids):
+        for i in ids:
+            del self.rows[i]
+
+    def persist(self):
+        pass
+
+
+def test_index_rerun_overwrites_instead_of_appending(tmp_path, monkeypatch):
+    store = FakeChroma()
+    monkeypatch.setattr(multi, "open_chroma", lambda db_dir, embed_type="HF", emb=None: store)
+    doc = tmp_path / "cli_rerun.md"
+    doc.write_text(CASES, encoding="utf-8")
+    args = ["index", str(doc), "--db-dir", str(tmp_path / "db")]
+
+    assert cli.main(args) == 0
+    assert cli.main(args) == 0
+    assert sorted(store.rows) == ["cli_rerun.md:0", "cli_rerun.md:1"]
+
+    doc.write_text(CASES.split("사례 2")[0], encoding="utf-8")
+    assert cli.main(args) == 0
+    assert sorted(store.rows) == ["cli_rerun.md:0"]
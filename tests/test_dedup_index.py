@@ -0,0 +1,24 @@
+from dedup_index import DedupIndex
+
+CASE = {"제목": "사례 1", "내용": "甲木 일간이 丙火 식신으로 戊土 재성을 생하니 재물이 모인다. " * 3}
+RULE = {"제목": "법칙 2", "내용": "庚金 辛金 이 겹치면 관살혼잡을 먼저 살핀다. " * 3}
+
+
+def test_remove_drops_source_and_promotes_next_canonical(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup.sqlite3"))
+    assert len(index.filter_blocks([CASE, RULE], "A.md")) == 2
+    assert index.filter_blocks([CASE], "B.md") == []
+
+    assert index.remove("A.md") == 2
+    assert index.stats() == {"blocks": 1, "clusters": 1, "duplicates": 0}
+    assert index.conn.execute("SELECT COUNT(*) FROM dedup_bands").fetchone()[0] == 16
+    # B.md 의 블록이 대표가 되어 다음 색인 때 임베딩된다
+    assert [b["제목"] for b in index.filter_blocks([CASE], "B.md")] == ["사례 1"]
+
+
+def test_replace_keeps_unchanged_blocks(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup.sqlite3"))
+    index.filter_blocks([CASE, RULE], "A.md")
+    assert len(index.filter_blocks([RULE], "A.md", replace=True)) == 1
+    assert index.sources(index.filter_blocks([RULE], "A.md")[0]["군집"]) == [("A.md", "법칙 2")]
+    assert index.stats()["blocks"] == 1
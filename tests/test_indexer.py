@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+
+import pytest
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "FastAPI_HTML_Single_Server")
+if SERVER_DIR not in sys.path:
+    sys.path.append(SERVER_DIR)
+
+from indexer import Indexer  # noqa: E402
+from test_cli import FakeChroma  # noqa: E402
+
+CASE = "사례 1 식신생재\n" + "甲木 일간이 丙火 식신으로 戊土 재성을 생하니 재물이 모인다. " * 3 + "\n"
+RULE = "사례 2 관살혼잡\n庚金 辛金 이 겹치면 관살혼잡을 먼저 살핀다.\n"
+
+
+def _wait(indexer, timeout=5):
+    deadline = time.time() + timeout
+    while any(j.status in ("queued", "running") for j in indexer.jobs()):
+        assert time.time() < deadline, [j.as_dict() for j in indexer.jobs()]
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def indexer(tmp_path):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    (uploads / "a.md").write_text(CASE + RULE, encoding="utf-8")
+    (uploads / "b.md").write_text(CASE, encoding="utf-8")
+    ix = Indexer(index_dir=str(tmp_path / "index"), dedup_db=str(tmp_path / "dedup.sqlite3"), upload_dir=str(uploads))
+    ix._db = FakeChroma()
+    for name in ("a.md", "b.md"):
+        ix.submit(str(uploads / name))
+        _wait(ix)
+    return ix
+
+
+def test_duplicate_upload_is_not_embedded_twice(indexer):
+    assert sorted(indexer._db.rows) == ["a.md:0", "a.md:1"]
+    assert indexer.status("b.md").blocks == 0
+
+
+def test_remove_runs_in_background_and_reindexes_promoted_duplicates(indexer):
+    with indexer._db_lock:  # an indexing job is busy with the vector store
+        job = indexer.remove("a.md")
+        assert job.action == "delete" and job.status in ("queued", "running")
+    _wait(indexer)
+    assert job.status == "done"
+    # b.md 의 중복 블록이 대표가 되어 다시 색인된다
+    assert sorted(indexer._db.rows) == ["b.md:0"]
+    assert indexer.status("b.md").blocks == 1
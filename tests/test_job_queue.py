@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+import job_queue
+from job_queue import JobQueue, WorkerPool
+
+
+class FakeJob:
+    """n 개 항목. fail_once 에 든 항목은 처음 한 번 실패, params["broken"] 이면 준비 단계에서 실패."""
+    kind = "fake"
+    processed = []
+    failed = set()
+
+    def __init__(self, params):
+        if params.get("broken"):
+            raise FileNotFoundError(params["path"])
+        self.params = params
+
+    def item_keys(self):
+        return [str(i) for i in range(self.params["n"])]
+
+    def process(self, key):
+        if key in self.params.get("fail_once", []) and key not in self.failed:
+            self.failed.add(key)
+            raise RuntimeError(f"item {key}")
+        self.processed.append(key)
+        return {"key": key}
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setitem(job_queue.HANDLERS, "fake", FakeJob)
+    monkeypatch.setattr(FakeJob, "processed", [])
+    monkeypatch.setattr(FakeJob, "failed", set())
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def _run_next(queue, **limits):
+    row = queue.claim("test", kind_limits=limits)
+    queue.run_job(row)
+    return queue.get(row["id"])
+
+
+def test_failed_items_retry_without_redoing_checkpointed_items(queue):
+    job_id = queue.submit("fake", {"n": 4, "fail_once": ["2"]})
+    job = _run_next(queue)
+    assert job["status"] == "queued" and job["done_items"] == 3
+    assert FakeJob.processed == ["0", "1", "3"]
+
+    job = _run_next(queue)
+    assert job["status"] == "done" and job["done_items"] == 4 and job["progress"] == 1.0
+    assert FakeJob.processed == ["0", "1", "3", "2"]
+    assert queue.get(job_id)["attempts"] == 2
+
+
+def test_setup_error_fails_job_after_last_attempt(queue):
+    queue.submit("fake", {"broken": True, "path": "없는파일.pdf"}, max_attempts=1)
+    job = _run_next(queue)
+    assert job["status"] == "failed"
+    assert "FileNotFoundError" in job["error"]
+
+
+def test_submit_rejects_bad_max_attempts(queue):
+    for bad in (None, 0):
+        with pytest.raises(ValueError):
+            queue.submit("fake", {"n": 1}, max_attempts=bad)
+
+
+def test_cancel_running_job_then_retry_resumes(queue):
+    job_id = queue.submit("fake", {"n": 2})
+    row = queue.claim("test")
+    assert queue.cancel(job_id)
+    queue.run_job(row)
+    assert queue.get(job_id)["status"] == "cancelled"
+    assert FakeJob.processed == []
+
+    assert queue.retry(job_id)
+    assert _run_next(queue)["status"] == "done"
+    assert FakeJob.processed == ["0", "1"]
+
+
+def test_claim_respects_kind_limits(queue):
+    first = queue.submit("fake", {"n": 1})
+    queue.submit("fake", {"n": 1})
+    assert queue.claim("a", kind_limits={"fake": 1})["id"] == first
+    assert queue.claim("b", kind_limits={"fake": 1}) is None
+    assert queue.claim("b", kind_limits={}) is not None
+
+
+def test_worker_survives_errors_in_run_job(queue, monkeypatch):
+    calls, done = [], threading.Event()
+    run_job = queue.run_job
+
+    def flaky_run_job(row):
+        calls.append(row["id"])
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        run_job(row)
+        done.set()
+
+    monkeypatch.setattr(queue, "run_job", flaky_run_job)
+    monkeypatch.setattr(queue, "requeue_stale", lambda max_age=0: 0)
+    first = queue.submit("fake", {"n": 1})
+    second = queue.submit("fake", {"n": 1})
+    pool = WorkerPool(queue, max_workers=1, poll_interval=0.01).start()
+    try:
+        assert done.wait(5)
+    finally:
+        pool.stop(5)
+    assert calls == [first, second]
+    assert queue.get(second)["status"] == "done"
+
+
+def test_submit_api_rejects_null_max_attempts(client):
+    res = client.post("/jobs/", json={"kind": "analyze_file", "params": {"path": "a.pdf"}, "max_attempts": None})
+    assert res.status_code == 422
@@ -0,0 +1,81 @@
+import importlib.util
+import json
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain.docstore.document import Document
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "FastAPI_HTML_Single_Server")
+
+
+@pytest.fixture(scope="module")
+def server():
+    # 루트 main.py 와 이름이 겹치므로 다른 모듈 이름으로 불러온다
+    if SERVER_DIR not in sys.path:
+        sys.path.append(SERVER_DIR)
+    spec = importlib.util.spec_from_file_location("query_server", os.path.join(SERVER_DIR, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _events(body):
+    events = []
+    for chunk in body.strip().split("\n\n"):
+        event, data = "message", None
+        for line in chunk.splitlines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((event, data))
+    return events
+
+
+def test_query_streams_context_tokens_and_done(server, monkeypatch):
+    docs = [Document(page_content="[사례] 식신생재\n甲木 일간이 丙火 식신으로 戊土 재성을 생한다.",
+                     metadata={"title": "식신생재", "source": "case.md"})]
+    monkeypatch.setattr(server, "retrieve", lambda question, k=3, vec=None: docs)
+    client = TestClient(server.app)
+    res = client.post("/query", json={"question": "식신이 재를 생하면?", "k": 2, "no_cache": True},
+                      headers={"Accept": "text/event-stream"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+
+    events = _events(res.text)
+    names = [e for e, _ in events]
+    assert names[:2] == ["sources", "context"]
+    assert names[-1] == "done"
+    assert events[0][1] == [{"title": "식신생재", "source": "case.md"}]
+    assert events[1][1]["tokens"] > 0
+    tokens = [data["token"] for e, data in events if e == "message"]
+    assert tokens and "식신생재" in "".join(tokens)
+
+
+@pytest.mark.parametrize("k", ["abc", 0, 21])
+def test_query_rejects_bad_k(server, k):
+    res = TestClient(server.app).post("/query", json={"question": "질문", "k": k})
+    assert res.status_code == 422
+
+
+def test_query_second_ask_is_served_from_answer_cache(server, monkeypatch):
+    docs = [Document(page_content="[사례] 관인상생\n관성이 인성을 생하고 인성이 일간을 돕는다.",
+                     metadata={"title": "관인상생", "source": "case.md"})]
+    monkeypatch.setattr(server, "retrieve", lambda question, k=3, vec=None: docs)
+    monkeypatch.setattr(server, "_embed_question", lambda question: ([1.0, 0.0, 0.0], server.answer_cache.version()))
+    server.answer_cache.clear()
+    client = TestClient(server.app)
+    first = client.post("/query", json={"question": "관인상생이란?"}).json()
+    second = client.post("/query", json={"question": "관인상생이 뭔가요?"}).json()
+    assert "cached" not in first
+    assert second["cached"] is True and second["answer"] == first["answer"]
+
+
+def test_query_server_exposes_metrics(server):
+    client = TestClient(server.app)
+    client.post("/query", json={"question": ""})
+    body = client.get("/metrics").text
+    assert 'mingli_http_requests_total{method="POST",route="/query",status="200"}' in body
+    assert "mingli_http_request_seconds_bucket" in body
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from saju_calc import compute_charts, format_pillars, parse_birth_info, update_cases
+
+
+def _pillars(birth, late_zi_next_day):
+    charts = compute_charts(np.array([birth], dtype="datetime64[m]"), np.array([True]),
+                            late_zi_next_day=late_zi_next_day)
+    stems, branches = format_pillars(charts)
+    return stems[0], branches[0]
+
+
+def test_late_zi_keeps_day_pillar_but_takes_next_day_hour_stem():
+    # 2000-01-01 은 戊午日, 다음 날은 己未日 → 23:30 은 甲子時 (己日 子時)
+    stems, branches = _pillars("2000-01-01T23:30", late_zi_next_day=False)
+    assert stems[2] + branches[2] == "戊午"
+    assert stems[3] + branches[3] == "甲子"
+
+
+def test_late_zi_next_day_mode_moves_day_pillar():
+    stems, branches = _pillars("2000-01-01T23:30", late_zi_next_day=True)
+    assert stems[2] + branches[2] == "己未"
+    assert stems[3] + branches[3] == "甲子"
+
+
+def test_early_zi_hour_uses_same_day():
+    # 00:30 은 당일 일간(戊) 기준 壬子時
+    stems, branches = _pillars("2000-01-01T00:30", late_zi_next_day=False)
+    assert stems[2] + branches[2] == "戊午"
+    assert stems[3] + branches[3] == "壬子"
+
+
+def test_date_only_birth_info_leaves_hour_pillar_empty():
+    births, male, ok, has_time = parse_birth_info(["1990-01-01", "1990-01-01 13:30 여", "모름"])
+    assert ok.tolist() == [True, True, False]
+    assert has_time.tolist() == [False, True, False]
+    stems, branches = format_pillars(compute_charts(births[ok], male[ok]), has_time[ok])
+    assert [len(s) for s in stems.tolist()] == [3, 4]
+    assert [len(b) for b in branches.tolist()] == [3, 4]
+
+
+@pytest.fixture
+def session():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from mingli_db_manager import Base
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    s = sessionmaker(bind=engine)()
+    yield s
+    s.close()
+
+
+def test_update_cases_keeps_hand_entered_charts_and_annotated_fortunes(session):
+    from mingli_db_manager import Case, MajorFortune
+    session.add_all([
+        Case(case_id=1, case_title="입력", birth_info="1990-01-01", celestial_stems="甲丙戊庚",
+             terrestrial_branches="子午辰戌", major_fortune="30세~40세 甲辰대운"),
+        Case(case_id=2, case_title="빈 명식", birth_info="1990-01-01"),
+        MajorFortune(case_id=1, age=30, celestial_stem="甲", terrestrial_branch="辰",
+                     fortune_analysis="대운 甲辰에 관인상생의 영향 극대화"),
+    ])
+    session.commit()
+
+    assert update_cases(session) == 1
+    hand, empty = session.get(Case, 1), session.get(Case, 2)
+    assert (hand.celestial_stems, hand.terrestrial_branches) == ("甲丙戊庚", "子午辰戌")
+    assert hand.major_fortune == "30세~40세 甲辰대운"
+    assert session.query(MajorFortune).filter_by(case_id=1).count() == 1
+    assert len(empty.celestial_stems) == 3 and empty.major_fortune
+    assert session.query(MajorFortune).filter_by(case_id=2).count() == 8
+
+    # --force: 명식/요약은 덮어쓰고, 해석이 적힌 대운 행은 남긴다
+    assert update_cases(session, force=True) == 2
+    session.expire_all()
+    assert session.get(Case, 1).celestial_stems == session.get(Case, 2).celestial_stems
+    fortunes = session.query(MajorFortune).filter_by(case_id=1).all()
+    assert any(f.fortune_analysis for f in fortunes)
+    assert len({f.age for f in fortunes}) == len(fortunes)
+    assert session.query(MajorFortune).filter_by(case_id=2).count() == 8